@@ -1,24 +1,144 @@
 from __future__ import annotations
 
 import argparse
+import datetime
 import json
-
-__CHECK_PERF = False
-if __CHECK_PERF:
-    import cProfile
-    import pstats
-
+import os
 from typing import Type
 
-from npuzzle.benchmark import Benchmark
-from npuzzle.distance import AVAILABLE_HEURISTICS, DEFAULT_HEURISTIC, Distance
+import pandas as pd
+
+from npuzzle.batch import BatchError, puzzle_paths, solve_batch
+from npuzzle.benchmark import STATS_DIRECTORY, Benchmark, RunError
+from npuzzle.budget import Budget
+from npuzzle.cache import CACHE_FILE, SolutionCache
+from npuzzle.distance import (
+    AVAILABLE_HEURISTICS,
+    DEFAULT_HEURISTIC,
+    Distance,
+    PatternDatabase,
+)
+from npuzzle.goal import GoalTable, Layout
 from npuzzle.npuzzle import MAX_N_VALUE, MIN_N_VALUE, Npuzzle
-from npuzzle.solver import AVAILABLE_SOLVERS, DEFAULT_SOLVER, Solver, is_informed
+from npuzzle.openlist import (
+    AVAILABLE_OPEN_LISTS,
+    DEFAULT_OPEN_LIST,
+    OpenList,
+    TieBreak,
+)
+from npuzzle.oracle import ORACLE_N, OracleError
+from npuzzle.oracle import build as build_oracle
+from npuzzle.oracle import oracle_path
+from npuzzle.pdb import (
+    Partition,
+    PatternDatabaseError,
+    build,
+    database_path,
+    default_partition,
+    parse_partition,
+)
+from npuzzle.profiling import PROFILE_FILE, PROFILE_TOP, profile
+from npuzzle.report import DEFAULT_INSTRUMENTATION, Instrumentation
+from npuzzle.solution import Solution
+from npuzzle.solver import (
+    AVAILABLE_SOLVERS,
+    DEFAULT_MAX_NODES,
+    DEFAULT_SOLVER,
+    DEFAULT_WEIGHT,
+    HeuristicError,
+    Solver,
+    SolverFactory,
+    is_compatible,
+    is_informed,
+)
+from npuzzle.walking import BoardTooBigError
 
 
 def main(args: argparse.Namespace) -> None:
     """Main function."""
 
+    # build a pattern database and leave
+    if args.build_pdb:
+        table = GoalTable.from_layout(args.build_pdb, args.goal)
+        partition = args.pdb_partition or default_partition(args.build_pdb)
+        path = database_path(table, partition)
+        build(table, partition, path, progress=print)
+        print(f"The pattern database has been saved in {path}.")
+        return
+
+    # build the oracle table and leave
+    if args.build_oracle:
+        table = GoalTable.from_layout(ORACLE_N, args.goal)
+        path = oracle_path(table)
+        build_oracle(table, path, progress=print)
+        print(f"The oracle table has been saved in {path}.")
+        return
+
+    # solutions already found, by this run or a previous one
+    cache = None if args.cache is None else SolutionCache(args.cache)
+
+    # the heuristic is shared by every solver the factory creates
+    heuristic = None
+    if is_informed(args.solver):
+        if not is_compatible(args.solver, args.heuristic):
+            error = HeuristicError(
+                args.heuristic.__name__,
+                message=f"{args.solver.__name__} can't use this heuristic",
+            )
+            print(f"Error: {error}")
+            return
+        if args.heuristic is PatternDatabase and args.pdb_partition:
+            heuristic = PatternDatabase(args.pdb_partition)
+        else:
+            heuristic = args.heuristic()
+    factory = SolverFactory(
+        args.solver,
+        heuristic,
+        open_list=args.open_list,
+        tie_break=args.tie_break,
+        jobs=args.jobs,
+        weight=args.weight,
+        anytime=not args.first_solution,
+        max_nodes=args.max_nodes,
+        max_bytes=args.max_bytes,
+        cache=cache,
+        instrumentation=args.instrumentation,
+    )
+
+    # limits of every solve, if any
+    budget = None
+    if any(
+        limit is not None
+        for limit in (
+            args.timeout,
+            args.max_expanded,
+            args.max_frontier,
+            args.max_memory,
+        )
+    ):
+        budget = Budget(
+            args.timeout, args.max_expanded, args.max_frontier, args.max_memory
+        )
+
+    # solve a batch of puzzles and leave
+    if args.batch:
+        try:
+            paths = puzzle_paths(args.batch)
+        except BatchError as e:
+            print(f"Error: {e}")
+            return
+        profile(
+            args.profile,
+            solve_batch,
+            paths,
+            factory,
+            layout=args.goal,
+            jobs=args.jobs,
+            budget=budget,
+            top=args.profile_top,
+        )
+        return
+
     # generate the puzzle
     if args.file:
         try:
@@ -27,26 +147,71 @@ def main(args: argparse.Namespace) -> None:
             print(f"Error: {e}")
             return
     else:
-        puzzle = Npuzzle.from_random(args.random, solvable=not args.unsolvable)
+        puzzle = Npuzzle.from_random(
+            args.random,
+            solvable=not args.unsolvable,
+            goal=Npuzzle.goal_for(args.random, args.goal),
+        )
+    goal = Npuzzle.goal_for(puzzle.n, args.goal)
 
     # check if the puzzle is solvable
-    if not puzzle.is_solvable():
+    if not puzzle.is_solvable(goal):
         print(f"This puzzle can't be solved.\n{puzzle}")
         return
 
     # benchmark if necessary and leave
-    if args.report or args.kompare or args.csv:
-        benchmark = Benchmark(args.config["solvers"], args.config["heuristics"])
+    if args.report or args.kompare or args.csv or args.resume:
+        benchmark = Benchmark(
+            args.config["solvers"], args.config["heuristics"], cache=cache
+        )
 
-        if args.csv:
-            for elem in benchmark.compute_statistics(iter=args.csv):
-                author, df = elem
-                Benchmark.to_csv(df, author)
+        if args.csv or args.resume:
+            name = (
+                args.resume
+                or args.run
+                or datetime.datetime.now().isoformat(timespec="minutes")
+            )
+            try:
+                paths = profile(
+                    args.profile,
+                    benchmark.stream_statistics,
+                    os.path.join(STATS_DIRECTORY, name),
+                    iter=args.csv,
+                    layout=args.goal,
+                    jobs=args.jobs,
+                    seed=args.seed,
+                    resume=bool(args.resume),
+                    top=args.profile_top,
+                )
+            except (RunError, OracleError, PatternDatabaseError, BoardTooBigError) as e:
+                print(f"Error: {e}")
+                return
+            print(f"Seed: {benchmark.seed}")
+            for path in paths:
+                print(f"The results have been saved in {path}.")
                 if args.describe:
-                    Benchmark.describe(df, author)
+                    author = os.path.splitext(os.path.basename(path))[0]
+                    Benchmark.describe(pd.read_csv(path, index_col=0), author)
+            if args.validate:
+                try:
+                    wrong = benchmark.validate(os.path.join(STATS_DIRECTORY, name))
+                except OracleError as e:
+                    print(f"Error: {e}")
+                    return
+                for author, indices in wrong.items():
+                    if indices:
+                        print(f"{author} is wrong on the puzzles {indices}.")
+                    else:
+                        print(f"{author} is right on every puzzle.")
             return
 
-        reports = benchmark.run(puzzle, puzzle.goal)
+        try:
+            reports = profile(
+                args.profile, benchmark.run, puzzle, goal, top=args.profile_top
+            )
+        except (OracleError, PatternDatabaseError, BoardTooBigError) as e:
+            print(f"Error: {e}")
+            return
         if args.report:
             for report in reports:
                 print(report)
@@ -58,32 +223,30 @@ def main(args: argparse.Namespace) -> None:
         return
 
     # create the solver with its heuristic if necessary
-    solver = args.solver
-    if is_informed(solver):
-        heuristic = args.heuristic()
-        solver = solver(heuristic)
-    else:
-        solver = solver()
+    solver = factory()
 
     # run
-    if __CHECK_PERF:
-        profile = cProfile.Profile()
-        res = profile.runcall(solver.run, puzzle, puzzle.goal)
-        ps = pstats.Stats(profile)
-        ps.print_stats()
-    else:
-        res = solver.run(puzzle, puzzle.goal)
+    try:
+        res = profile(
+            args.profile, solver.run, puzzle, goal, budget, top=args.profile_top
+        )
+    except (OracleError, PatternDatabaseError, BoardTooBigError) as e:
+        print(f"Error: {e}")
+        return
 
     # print the report
-    if res is None:
+    if res is None and solver.report.budget_hit is not None:
+        print(f"Out of budget: {solver.report.budget_hit.value}.")
+        print(solver.report)
+    elif res is None:
         print("No solution found.")
+    elif args.moves_only:
+        print(Solution.from_node(res))
     else:
-        try:
-            res.display_genealogy(ascending=False)
-        except RecursionError:
-            print("The path is too big to be displayed.")
-        finally:
-            print(solver.report)
+        solution = Solution.from_node(res)
+        solution.display()
+        print(f"Moves: {solution}")
+        print(solver.report)
 
     # write the puzzle to a file if necessary
     if not (args.output is None):
@@ -106,6 +269,53 @@ def get_args() -> argparse.Namespace:
                 f"The value of 'random' must be in ({MIN_N_VALUE}, {MAX_N_VALUE}) range. ({value} here)"
             )
 
+    def check_jobs(value: str) -> int:
+        """Check the number of processes."""
+
+        if int(value) >= 1:
+            return int(value)
+        else:
+            raise argparse.ArgumentTypeError(
+                f"The value of 'jobs' must be at least 1. ({value} here)"
+            )
+
+    def check_positive(value: str) -> int:
+        """Check a number of nodes."""
+
+        if int(value) >= 0:
+            return int(value)
+        else:
+            raise argparse.ArgumentTypeError(
+                f"The value must be positive. ({value} here)"
+            )
+
+    def check_weight(value: str) -> float:
+        """Check the weight of the heuristic."""
+
+        if float(value) >= 1:
+            return float(value)
+        else:
+            raise argparse.ArgumentTypeError(
+                f"The weight must be at least 1. ({value} here)"
+            )
+
+    def check_size(value: str) -> int:
+        """Check a size in bytes, with an optional K, M or G suffix."""
+
+        units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+        unit = units.get(value[-1:].upper(), 1)
+        try:
+            size = int(float(value[:-1] if unit > 1 else value) * unit)
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"The size must look like 1048576, 512M or 2G. ({value!r} here)"
+            )
+        if size <= 0:
+            raise argparse.ArgumentTypeError(
+                f"The size must be positive. ({value!r} here)"
+            )
+        return size
+
     def check_heuristic(value: str) -> Type[Distance]:
         """Check the value of solver."""
 
@@ -126,6 +336,42 @@ def get_args() -> argparse.Namespace:
             f"The value of 'solver' must be in {([solver.__name__ for solver in AVAILABLE_SOLVERS])}. ({value!r} here)"
         )
 
+    def check_open_list(value: str) -> Type[OpenList]:
+        """Check the value of open list."""
+
+        for open_list in AVAILABLE_OPEN_LISTS:
+            if open_list.__name__ == value:
+                return open_list
+        raise argparse.ArgumentTypeError(
+            f"The value of 'open list' must be in {([open_list.__name__ for open_list in AVAILABLE_OPEN_LISTS])}. ({value!r} here)"
+        )
+
+    def check_tie_break(value: str) -> TieBreak:
+        """Check the value of tie break."""
+
+        for tie_break in TieBreak:
+            if tie_break.name == value:
+                return tie_break
+        raise argparse.ArgumentTypeError(
+            f"The value of 'tie break' must be in {([tie_break.name for tie_break in TieBreak])}. ({value!r} here)"
+        )
+
+    def check_partition(value: str) -> Partition:
+        """Check the value of the partition."""
+
+        try:
+            partition = parse_partition(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"The partition must look like '5-5-5' or '1,2,3/4,5,6'. ({value!r} here)"
+            )
+        tiles = [tile for group in partition for tile in group]
+        if len(tiles) != len(set(tiles)) or min(tiles) < 1:
+            raise argparse.ArgumentTypeError(
+                f"The groups of the partition must be disjoint and must not contain 0. ({value!r} here)"
+            )
+        return partition
+
     def check_cfg(value: str) -> dict[str, list[Type[Solver]] | list[Type[Distance]]]:
         """Chech the value of the config."""
 
@@ -167,6 +413,13 @@ def get_args() -> argparse.Namespace:
         metavar="FILENAME",
         help="n-puzzle to load",
     )
+    group.add_argument(
+        "-B",
+        "--batch",
+        type=str,
+        metavar="SOURCE",
+        help="solves every puzzle of SOURCE, a directory, a glob, a file of puzzles or - for stdin, and prints one json line per puzzle",
+    )
     group.add_argument(
         "-R",
         "--random",
@@ -191,6 +444,58 @@ def get_args() -> argparse.Namespace:
         default=DEFAULT_SOLVER,
         help=f"algorithm to use. {[solver.__name__ for solver in AVAILABLE_SOLVERS]}",
     )
+    parser.add_argument(
+        "-O",
+        "--open-list",
+        type=check_open_list,
+        metavar="NAME",
+        default=DEFAULT_OPEN_LIST,
+        help=f"open list used by AStar, Dijkstra and GreedySearch. {[open_list.__name__ for open_list in AVAILABLE_OPEN_LISTS]}",
+    )
+    parser.add_argument(
+        "-T",
+        "--tie-break",
+        type=check_tie_break,
+        metavar="NAME",
+        default=TieBreak.HIGH_G,
+        help=f"how the open list breaks ties. {[tie_break.name for tie_break in TieBreak]}",
+    )
+    parser.add_argument(
+        "-w",
+        "--weight",
+        type=check_weight,
+        metavar="W",
+        default=None,
+        help=f"first weight of the heuristic of ARAStar, lowered after each solution ({DEFAULT_WEIGHT} by default)",
+    )
+    parser.add_argument(
+        "--first-solution",
+        action="store_true",
+        default=False,
+        help="ARAStar stops at the first solution, at most W times the optimal",
+    )
+    parser.add_argument(
+        "--max-nodes",
+        type=check_positive,
+        metavar="N",
+        default=None,
+        help=f"nodes SMAStar keeps in memory at most ({DEFAULT_MAX_NODES} by default)",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=check_size,
+        metavar="SIZE",
+        default=None,
+        help="bytes the nodes of SMAStar take at most (e.g. 64M), the lowest of both limits when --max-nodes too",
+    )
+    parser.add_argument(
+        "-G",
+        "--goal",
+        type=Layout,
+        metavar="LAYOUT",
+        default=Layout.SNAIL,
+        help=f"layout of the goal. {[layout.value for layout in Layout]}",
+    )
     parser.add_argument(
         "-U",
         "--unsolvable",
@@ -212,6 +517,58 @@ def get_args() -> argparse.Namespace:
         default=False,
         help="prints out a report for each type of solver/heuristic (with a config)",
     )
+    parser.add_argument(
+        "-I",
+        "--instrumentation",
+        type=Instrumentation,
+        metavar="LEVEL",
+        default=DEFAULT_INSTRUMENTATION,
+        help=f"what the solver measures, full also measures the peak of memory. {[level.value for level in Instrumentation]}",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        metavar="SECONDS",
+        default=None,
+        help="gives up a solve after SECONDS",
+    )
+    parser.add_argument(
+        "--max-expanded",
+        type=check_positive,
+        metavar="N",
+        default=None,
+        help="gives up a solve after N expanded nodes",
+    )
+    parser.add_argument(
+        "--max-frontier",
+        type=check_positive,
+        metavar="N",
+        default=None,
+        help="gives up a solve once N nodes wait to be expanded",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=check_size,
+        metavar="SIZE",
+        default=None,
+        help="gives up a solve once the process uses SIZE bytes (e.g. 512M or 2G)",
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        nargs="?",
+        metavar="FILE",
+        const=CACHE_FILE,
+        default=None,
+        help=f"answers from the solutions found before, by this run or a previous one, for the puzzle or a symmetric one, and keeps the new ones in FILE ({CACHE_FILE} by default)",
+    )
+    parser.add_argument(
+        "-m",
+        "--moves-only",
+        action="store_true",
+        default=False,
+        help="only prints the moves of the empty tile (U, R, D and L) instead of every state",
+    )
     parser.add_argument(
         "-o",
         "--output",
@@ -235,6 +592,41 @@ def get_args() -> argparse.Namespace:
         default=None,
         help="perform some tests with ITER puzzles (with a config)",
     )
+    parser.add_argument(
+        "--run",
+        type=str,
+        metavar="NAME",
+        default=None,
+        help=f"when --csv, name of the run, its results are streamed to {STATS_DIRECTORY}NAME/ (the date by default)",
+    )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        metavar="NAME",
+        default=None,
+        help="resume an interrupted run, only the missing jobs are run (with the same config)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=check_jobs,
+        metavar="N",
+        default=None,
+        help="number of processes for --csv, --batch and the parallel solvers (all the cores by default for the latter)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        metavar="SEED",
+        default=None,
+        help="when --csv, master seed from which every puzzle and job is drawn",
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        default=False,
+        help="when --csv, check the results against the oracle, the exact distances of the 3x3 puzzle",
+    )
     parser.add_argument(
         "-d",
         "--describe",
@@ -242,6 +634,42 @@ def get_args() -> argparse.Namespace:
         default=False,
         help="when --csv, describe each csv",
     )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        nargs="?",
+        metavar="FILE",
+        const=PROFILE_FILE,
+        default=None,
+        help=f"profile the solve or the benchmark, save it to FILE ({PROFILE_FILE} by default) and print the hotspots and the time of each phase. The processes of a pool aren't profiled",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        metavar="N",
+        default=PROFILE_TOP,
+        help="when --profile, number of functions printed, by cumulative time",
+    )
+    parser.add_argument(
+        "--build-pdb",
+        type=check_random,
+        metavar="N",
+        default=None,
+        help="build the pattern database of the N puzzle for the goal and leave",
+    )
+    parser.add_argument(
+        "--pdb-partition",
+        type=check_partition,
+        metavar="GROUPS",
+        default=None,
+        help="groups of tiles of the pattern database, e.g. 6-6-3 or 1,2,3/4,5,6/7,8",
+    )
+    parser.add_argument(
+        "--build-oracle",
+        action="store_true",
+        default=False,
+        help=f"build the table of the exact distances of every {ORACLE_N}x{ORACLE_N} state for the goal and leave",
+    )
 
     args = parser.parse_args()
     return args
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import contextlib
+import glob
+import json
+import multiprocessing
+import os
+import sys
+from typing import IO, Any, Iterable, Iterator, List, Optional, Tuple
+
+from npuzzle.budget import Budget
+from npuzzle.goal import Layout
+from npuzzle.npuzzle import Npuzzle
+from npuzzle.solution import Solution
+from npuzzle.solvability import solvable_mask
+from npuzzle.solver import SolverFactory, has_jobs
+
+STDIN = "-"
+# puzzles whose solvability is checked at once, before they are dispatched
+CHUNK_SIZE = 256
+
+# path, index in the file, n and tiles of a puzzle read for a batch
+Entry = Tuple[str, int, int, List[int]]
+# an entry and whether its puzzle can be solved, None when it isn't valid
+Checked = Tuple[Entry, Optional[bool]]
+
+
+class BatchError(Exception):
+    """Exception raised when the source of a batch has no puzzle file."""
+
+    def __init__(self, source: str, message: str = "No puzzle file found") -> None:
+        self.source = source
+        self.message = f"{message}. ({self.source} here)"
+        super().__init__(self.message)
+
+
+def puzzle_paths(source: str) -> list[str]:
+    # a directory, a file, a glob or - for stdin
+    if source == STDIN or os.path.isfile(source):
+        return [source]
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source)
+    paths = sorted(path for path in paths if os.path.isfile(path))
+    if not paths:
+        raise BatchError(source)
+    return paths
+
+
+def parse_puzzles(lines: Iterable[str]) -> Iterator[tuple[int, list[int]]]:
+    # the format of Npuzzle.from_file, repeated: a line holding a single
+    # number starts a puzzle. A puzzle is yielded as soon as it is complete,
+    # so that puzzles streamed on stdin are solved as they come
+    n = -1
+    tiles: list[int] = []
+    for line in lines:
+        numbers = [int(elem) for elem in line.split("#")[0].split() if elem.isnumeric()]
+        if not numbers:
+            continue
+        if len(numbers) == 1:
+            if tiles:
+                yield n, tiles
+            n = numbers[0]
+            tiles = []
+        else:
+            tiles += numbers
+        if n > 0 and len(tiles) == n * n:
+            yield n, tiles
+            n = -1
+            tiles = []
+    if tiles or n != -1:
+        yield n, tiles
+
+
+def read_entries(paths: list[str]) -> Iterator[Entry]:
+    for path in paths:
+        source = contextlib.nullcontext(sys.stdin) if path == STDIN else open(path)
+        with source as f:
+            for index, (n, tiles) in enumerate(parse_puzzles(f)):
+                yield path, index, n, tiles
+
+
+def _check_chunk(chunk: list[Entry], layout: Layout) -> Iterator[Checked]:
+    solvable: list[bool | None] = [None] * len(chunk)
+    sizes: dict[int, list[int]] = {}
+    for i, (_, _, n, tiles) in enumerate(chunk):
+        try:
+            Npuzzle(n, tiles)
+        except Exception:
+            continue
+        sizes.setdefault(n, []).append(i)
+    for n, indices in sizes.items():
+        boards = [chunk[i][3] for i in indices]
+        mask = solvable_mask(boards, Npuzzle.goal_for(n, layout))
+        for i, value in zip(indices, mask.tolist()):
+            solvable[i] = value
+    return zip(chunk, solvable)
+
+
+def check_entries(
+    entries: Iterable[Entry], layout: Layout, size: int = CHUNK_SIZE
+) -> Iterator[Checked]:
+    # the solvability of a chunk of puzzles in one go, but the ones streamed
+    # on stdin are checked one by one so that they are solved as they come
+    chunk: list[Entry] = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) >= size or entry[0] == STDIN:
+            yield from _check_chunk(chunk, layout)
+            chunk = []
+    yield from _check_chunk(chunk, layout)
+
+
+# state of the process solving the puzzles, set once by _init_worker
+_worker: tuple[SolverFactory, Layout, Budget | None] | None = None
+
+
+def _init_worker(factory: SolverFactory, layout: Layout, budget: Budget | None) -> None:
+    global _worker
+    _worker = (factory, layout, budget)
+
+
+def _init_pool_worker(
+    factory: SolverFactory, layout: Layout, budget: Budget | None
+) -> None:
+    # what the solvers print must not end up between the json lines
+    sys.stdout = sys.stderr
+    _init_worker(factory, layout, budget)
+
+
+def solve_entry(checked: Checked) -> dict[str, Any]:
+    assert _worker is not None
+    factory, layout, budget = _worker
+    (path, index, n, tiles), solvable = checked
+    record: dict[str, Any] = {"source": path, "index": index}
+    try:
+        # raises again what made the check leave the puzzle out
+        puzzle = Npuzzle(n, tiles)
+        goal = Npuzzle.goal_for(n, layout)
+        record["solvable"] = solvable
+        if not record["solvable"]:
+            return record
+
+        solver = factory()
+        res = solver.run(puzzle, goal, budget)
+    except Exception as e:
+        record["error"] = str(e)
+        return record
+
+    report = solver.report
+    record["moves"] = None if res is None else str(Solution.from_node(res))
+    record["length"] = report.result
+    record["time_complexity"] = report.time_complexity
+    record["size_complexity"] = report.size_complexity
+    record["time_taken"] = report.time_taken_in_s
+    record["author"] = report.author
+    if report.stages:
+        record["suboptimality"] = report.suboptimality
+    if report.cache_hits or report.cache_misses:
+        record["cached"] = report.cache_hits > 0
+    if report.budget_hit is not None:
+        record["budget_hit"] = report.budget_hit.value
+        record["best_h"] = report.best_h
+        record["bound"] = report.bound
+    return record
+
+
+def solve_batch(
+    paths: list[str],
+    factory: SolverFactory,
+    layout: Layout = Layout.SNAIL,
+    jobs: int | None = None,
+    budget: Budget | None = None,
+    out: IO[str] | None = None,
+) -> None:
+    # one json line per puzzle on out, in the order of the puzzles, whatever
+    # the solvers print goes to stderr
+    if out is None:
+        out = sys.stdout
+    entries = check_entries(read_entries(paths), layout)
+    with contextlib.redirect_stdout(sys.stderr):
+        # solvers that start processes of their own can't run in a pool
+        if jobs is not None and jobs > 1 and not has_jobs(factory.solver):
+            with multiprocessing.Pool(
+                jobs, initializer=_init_pool_worker, initargs=(factory, layout, budget)
+            ) as pool:
+                for record in pool.imap(solve_entry, entries):
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+        else:
+            _init_worker(factory, layout, budget)
+            for record in map(solve_entry, entries):
+                out.write(json.dumps(record) + "\n")
+                out.flush()
@@ -1,42 +1,184 @@
 from __future__ import annotations
 
-import datetime
+import csv
+import itertools
+import json
+import multiprocessing
 import os
-from typing import Any, Iterator, Type
+import random
+from typing import IO, Any, Iterable, Iterator, Optional, Tuple, Type
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from npuzzle.cache import SolutionCache
 from npuzzle.distance import Distance
+from npuzzle.goal import GoalTable, Layout
 from npuzzle.npuzzle import Npuzzle
+from npuzzle.oracle import ORACLE_N, OracleError, load, oracle_path
 from npuzzle.report import Report
-from npuzzle.solver import Solver, is_informed
+from npuzzle.solvability import random_puzzles
+from npuzzle.solver import (
+    CachedSolver,
+    Solver,
+    has_jobs,
+    is_compatible,
+    is_informed,
+    is_optimal,
+    missing_table,
+)
+from npuzzle.state import PackedState
 
 STATS_DIRECTORY = "data/"
+RUN_FILE = "run.json"
+COLUMNS = ["puzzle", "size complexity", "time complexity", "time taken", "result"]
+# jobs handed to the pool at once, per process, so that the jobs of a run
+# are never all in memory
+JOBS_PER_PROCESS = 16
+# puzzles of a run drawn at once
+PUZZLES_PER_CHUNK = 256
+
+# puzzle index, solver, heuristic, puzzle, goal, seed and cache of a benchmark job
+Job = Tuple[
+    int,
+    Type[Solver],
+    Optional[Type[Distance]],
+    Npuzzle,
+    Npuzzle,
+    int,
+    Optional[SolutionCache],
+]
+# author, puzzle index and mini report of a finished job
+Result = Tuple[str, int, Tuple[Any, ...]]
+
+
+class RunError(Exception):
+    """Exception raised when a benchmark run can't be started or resumed."""
+
+    def __init__(self, directory: str, message: str = "Invalid run") -> None:
+        self.directory = directory
+        self.message = f"{message}. ({self.directory} here)"
+        super().__init__(self.message)
+
+
+def run_job(job: Job) -> Result:
+    index, solver, distance, puzzle, goal, seed, cache = job
+    # whatever the solvers draw at random only depends on the job
+    random.seed(seed)
+    np.random.seed(seed)
+    model = solver() if distance is None else solver(distance())  # type: ignore
+    # each solver only reuses its own solutions, or they would be compared
+    # with the work of another one
+    if cache is not None:
+        model = CachedSolver(model, cache, scope=model.report.author)
+    model.run(puzzle, goal)
+    report = model.report
+    return (
+        report.author,
+        index,
+        (
+            report.size_complexity,
+            report.time_complexity,
+            report.time_taken_in_s,
+            report.result,
+        ),
+    )
+
+
+class ResultWriter:
+    # one append-only csv per author, every row is flushed as soon as its job
+    # is done, so an interrupted run loses nothing but the running jobs
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.__files: dict[str, IO[str]] = {}
+
+    def __enter__(self) -> ResultWriter:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        for f in self.__files.values():
+            f.close()
+        self.__files.clear()
+
+    def path(self, author: str) -> str:
+        return os.path.join(self.directory, f"{author}.csv")
+
+    def done(self, author: str) -> set[int]:
+        path = self.path(author)
+        if not os.path.exists(path):
+            return set()
+        # the last row may have been cut by the interruption
+        with open(path, "r+", newline="") as f:
+            content = f.read()
+            if not content.endswith("\n"):
+                f.truncate(content.rfind("\n") + 1)
+        with open(path, newline="") as f:
+            return {int(row[0]) for row in list(csv.reader(f))[1:]}
+
+    def __file(self, author: str) -> IO[str]:
+        f = self.__files.get(author)
+        if f is None:
+            path = self.path(author)
+            exists = os.path.exists(path) and os.path.getsize(path) > 0
+            f = open(path, "a", newline="")
+            if not exists:
+                csv.writer(f).writerow(COLUMNS)
+            self.__files[author] = f
+        return f
+
+    def write(self, result: Result) -> None:
+        author, index, mini_report = result
+        f = self.__file(author)
+        csv.writer(f).writerow([index, *mini_report])
+        f.flush()
 
 
 class Benchmark:
     def __init__(
-        self, solvers: list[Type[Solver]], distances: list[Type[Distance]]
+        self,
+        solvers: list[Type[Solver]],
+        distances: list[Type[Distance]],
+        cache: SolutionCache | None = None,
     ) -> None:
         self.solvers = solvers
         self.distances = distances
+        self.cache = cache
+        self.__missing: set[str] = set()
+        self.__chunk_key: tuple[int, int, PackedState] | None = None
+        self.__chunk: list[Npuzzle] = []
 
-    def __iter_solvers(self) -> Iterator[Solver]:
+    def __iter_models(
+        self, goal: Npuzzle
+    ) -> Iterator[tuple[Type[Solver], Type[Distance] | None]]:
+        # the pairs that can't solve a puzzle of this size are left out, and
+        # so are those whose table wasn't built, with a warning
         for solver in self.solvers:
-            if is_informed(solver):
-                for distance in self.distances:
-                    model = solver(distance())
-                    yield model
-            else:
+            distances = self.distances if is_informed(solver) else [None]
+            for distance in distances:
+                if not is_compatible(solver, distance, goal.n):
+                    continue
+                path = missing_table(solver, distance, goal)
+                if path is None:
+                    yield solver, distance
+                elif path not in self.__missing:
+                    self.__missing.add(path)
+                    print(f"Warning: no table in {path}, its solvers are left out.")
+
+    def __iter_solvers(self, goal: Npuzzle) -> Iterator[Solver]:
+        for solver, distance in self.__iter_models(goal):
+            if distance is None:
                 model = solver()
-                yield model
+            else:
+                model = solver(distance())  # type: ignore
+            yield model
 
     def run(self, start: Npuzzle, goal: Npuzzle) -> list[Report]:
         reports: list[Report] = []
 
-        for model in self.__iter_solvers():
+        for model in self.__iter_solvers(goal):
+            if self.cache is not None:
+                model = CachedSolver(model, self.cache, scope=model.report.author)
             model.run(start, goal)
             reports.append(model.report)
 
@@ -75,52 +217,146 @@ class Benchmark:
         plt.legend()
         plt.show()
 
-    def compute_statistics(
-        self, iter: int = 100, n: int = 3
-    ) -> list[tuple[str, pd.DataFrame]]:
-        puzzles = [Npuzzle.from_random(n, solvable=True) for _ in range(iter)]
-        goal = puzzles[0].goal
-
-        reports: dict[str, list[Any]] = {}
-        for solver in self.__iter_solvers():
-            reports[solver.report.author] = []
-
-        for puzzle in puzzles:
-            for solver in self.__iter_solvers():
-                solver.run(puzzle, goal)
-                current_report = solver.report
-                mini_report = (
-                    current_report.size_complexity,
-                    current_report.time_complexity,
-                    current_report.time_taken_in_s,
-                    current_report.result,
-                )
-                reports[solver.report.author].append(mini_report)
-
-        return [
-            (
-                author,
-                pd.DataFrame(
-                    report,
-                    columns=[
-                        "size complexity",
-                        "time complexity",
-                        "time taken",
-                        "result",
-                    ],
-                ),
+    def __puzzle(self, index: int, goal: Npuzzle, seed: int) -> Npuzzle:
+        # the puzzles are drawn by chunks, each from its own seed, so that any
+        # of them is drawn along with its chunk only
+        chunk = index // PUZZLES_PER_CHUNK
+        key = (chunk, seed, GoalTable.of(goal).key)
+        if self.__chunk_key != key:
+            rng = np.random.default_rng(
+                np.random.SeedSequence(seed, spawn_key=(chunk,))
             )
-            for author, report in reports.items()
-        ]
+            self.__chunk = random_puzzles(
+                goal.n, PUZZLES_PER_CHUNK, solvable=True, goal=goal, rng=rng
+            )
+            self.__chunk_key = key
+        return self.__chunk[index % PUZZLES_PER_CHUNK]
+
+    def __matrix(
+        self,
+        iter: int,
+        n: int,
+        layout: Layout,
+        seed: int,
+        skip: dict[str, set[int]] | None = None,
+    ) -> Iterator[Job]:
+        # every job gets its own seed, derived from the master one and from
+        # its position in the matrix, so the order of execution doesn't matter
+        goal = Npuzzle.goal_for(n, layout)
+        models = list(zip(self.__iter_models(goal), self.__iter_solvers(goal)))
+        for i in range(iter):
+            todo = [
+                (j, solver, distance)
+                for j, ((solver, distance), model) in enumerate(models)
+                if skip is None or i not in skip.get(model.report.author, ())
+            ]
+            if not todo:
+                continue
+            puzzle = self.__puzzle(i, goal, seed)
+            for j, solver, distance in todo:
+                job_seed = np.random.SeedSequence(seed, spawn_key=(i, j))
+                seed_value = int(job_seed.generate_state(1)[0])
+                yield i, solver, distance, puzzle, goal, seed_value, self.cache
 
     @staticmethod
-    def to_csv(df: pd.DataFrame, author: str) -> None:
-        if not os.path.exists(STATS_DIRECTORY):
-            os.makedirs(STATS_DIRECTORY)
+    def __results(matrix: Iterable[Job], jobs: int | None) -> Iterator[Result]:
+        if jobs is None or jobs <= 1:
+            yield from map(run_job, matrix)
+            return
 
-        df.to_csv(
-            f"{STATS_DIRECTORY}{author}_{datetime.datetime.now().isoformat(timespec='minutes')}.csv"
-        )
+        # the matrix is read by chunks, as the pool would read it all at once.
+        # Solvers that start processes of their own can't run in a pool, they
+        # run after the others of their chunk
+        matrix = iter(matrix)
+        with multiprocessing.Pool(jobs) as pool:
+            while True:
+                chunk = list(itertools.islice(matrix, jobs * JOBS_PER_PROCESS))
+                if not chunk:
+                    return
+                pooled = [job for job in chunk if not has_jobs(job[1])]
+                yield from pool.imap_unordered(run_job, pooled)
+                for job in chunk:
+                    if has_jobs(job[1]):
+                        yield run_job(job)
+
+    def stream_statistics(
+        self,
+        directory: str,
+        iter: int = 100,
+        n: int = 3,
+        layout: Layout = Layout.SNAIL,
+        jobs: int | None = None,
+        seed: int | None = None,
+        resume: bool = False,
+    ) -> list[str]:
+        # the parameters are saved with the results, a resumed run reads them
+        # back and only runs the jobs missing from the files
+        run_path = os.path.join(directory, RUN_FILE)
+        if resume:
+            try:
+                with open(run_path) as f:
+                    run = json.load(f)
+            except (OSError, ValueError):
+                raise RunError(directory, message="Nothing to resume")
+        else:
+            if os.path.exists(run_path):
+                raise RunError(directory, message="This run already exists")
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            run = {
+                "iter": iter,
+                "n": n,
+                "layout": layout.value,
+                "seed": np.random.SeedSequence(seed).entropy,
+            }
+            with open(run_path, "w") as f:
+                json.dump(run, f, indent=4)
+        self.seed = run["seed"]
+
+        with ResultWriter(directory) as writer:
+            goal = Npuzzle.goal_for(run["n"], Layout(run["layout"]))
+            authors = [solver.report.author for solver in self.__iter_solvers(goal)]
+            done = {author: writer.done(author) for author in authors}
+            matrix = self.__matrix(
+                run["iter"], run["n"], Layout(run["layout"]), run["seed"], skip=done
+            )
+            for result in self.__results(matrix, jobs):
+                writer.write(result)
+            return [writer.path(author) for author in authors]
+
+    def validate(self, directory: str) -> dict[str, list[int]]:
+        # the puzzles of a streamed run whose result contradicts the oracle, by
+        # author: an optimal solver must find the shortest solution, the others
+        # can't do better. Failed solves aren't wrong
+        with open(os.path.join(directory, RUN_FILE)) as f:
+            run = json.load(f)
+        goal = Npuzzle.goal_for(run["n"], Layout(run["layout"]))
+        table = GoalTable.of(goal)
+        if run["n"] != ORACLE_N:
+            raise OracleError(
+                oracle_path(table),
+                message=f"The oracle only knows the {ORACLE_N}x{ORACLE_N} states",
+            )
+        oracle = load(table)
+        shortest = [
+            oracle.distance(self.__puzzle(index, goal, run["seed"]).tiles)
+            for index in range(run["iter"])
+        ]
+
+        wrong: dict[str, list[int]] = {}
+        for model in self.__iter_solvers(goal):
+            author = model.report.author
+            path = os.path.join(directory, f"{author}.csv")
+            if not os.path.exists(path):
+                continue
+            optimal = is_optimal(model)
+            results = pd.read_csv(path, index_col=0)["result"].dropna()
+            wrong[author] = sorted(
+                int(index)
+                for index, result in results.items()
+                if result < shortest[index] or (optimal and result != shortest[index])
+            )
+        return wrong
 
     @staticmethod
     def describe(df: pd.DataFrame, author: str) -> None:
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+import resource
+import sys
+import time
+from enum import Enum
+
+# calls of Budget.check between two looks at the clock and at the memory
+CHECK_INTERVAL = 1024
+
+
+class Limit(Enum):
+    TIME = "time"
+    EXPANDED = "expanded"
+    FRONTIER = "frontier"
+    MEMORY = "memory"
+
+
+def rss(pid: int | None = None) -> int:
+    # resident set size in bytes, from /proc when there is one, else the peak
+    # of the current process
+    path = f"/proc/{'self' if pid is None else pid}/statm"
+    try:
+        with open(path) as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        if pid is not None:
+            return 0
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class Budget:
+    # limits of a single run, the clock starts with start(), which the solvers
+    # call first, so that the same budget can be given to several runs. The
+    # memory is what the process took since then
+    def __init__(
+        self,
+        seconds: float | None = None,
+        expanded: int | None = None,
+        frontier: int | None = None,
+        memory: int | None = None,
+    ) -> None:
+        self.seconds = seconds
+        self.expanded = expanded
+        self.frontier = frontier
+        self.memory = memory
+        self.deadline: float | None = None
+        self.baseline = 0
+        self.__countdown = CHECK_INTERVAL
+
+    def start(self) -> None:
+        self.__countdown = CHECK_INTERVAL
+        if self.seconds is not None:
+            # monotonic is the same clock in every process
+            self.deadline = time.monotonic() + self.seconds
+        if self.memory is not None:
+            self.baseline = rss()
+
+    def exceeded(
+        self, expanded: int = 0, frontier: int = 0, memory: int = 0
+    ) -> Limit | None:
+        # memory is what the run uses outside of this process, if any
+        if self.expanded is not None and expanded >= self.expanded:
+            return Limit.EXPANDED
+        if self.frontier is not None and frontier > self.frontier:
+            return Limit.FRONTIER
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return Limit.TIME
+        if self.memory is not None and rss() - self.baseline + memory > self.memory:
+            return Limit.MEMORY
+        return None
+
+    def check(self, expanded: int, frontier: int = 0) -> Limit | None:
+        # cheap enough for every node, as the clock and the memory are only
+        # read every CHECK_INTERVAL calls
+        if self.expanded is not None and expanded >= self.expanded:
+            return Limit.EXPANDED
+        if self.frontier is not None and frontier > self.frontier:
+            return Limit.FRONTIER
+        self.__countdown -= 1
+        if self.__countdown:
+            return None
+        self.__countdown = CHECK_INTERVAL
+        return self.exceeded()
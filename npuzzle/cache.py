@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, NamedTuple, Tuple
+
+from npuzzle.goal import GoalTable
+from npuzzle.npuzzle import EMPTY_TILE, MOVE_LETTERS, Move, Npuzzle
+from npuzzle.state import PackedState
+from npuzzle.utils import coor_to_index, index_to_coor
+
+CACHE_FILE = "cache/solutions.sqlite"
+# solutions kept in memory, in front of the file
+DEFAULT_CACHE_SIZE = 1 << 12
+# seconds a process waits for another one writing to the file
+SQLITE_TIMEOUT = 30.0
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS solutions (
+    board BLOB NOT NULL,
+    goal BLOB NOT NULL,
+    optimal INTEGER NOT NULL,
+    scope TEXT NOT NULL,
+    moves TEXT NOT NULL,
+    PRIMARY KEY (board, goal, optimal, scope)
+)"""
+
+# canonical board, goal, whether the solution is optimal and who may reuse it
+Entry = Tuple[PackedState, PackedState, bool, str]
+
+# the 8 symmetries of the square, on the coordinates (x, y) of a cell
+_SQUARE: tuple[Callable[[int, int, int], tuple[int, int]], ...] = (
+    lambda x, y, n: (x, y),
+    lambda x, y, n: (n - 1 - y, x),
+    lambda x, y, n: (n - 1 - x, n - 1 - y),
+    lambda x, y, n: (y, n - 1 - x),
+    lambda x, y, n: (n - 1 - x, y),
+    lambda x, y, n: (x, n - 1 - y),
+    lambda x, y, n: (y, x),
+    lambda x, y, n: (n - 1 - y, n - 1 - x),
+)
+
+# how each move shifts the empty tile, in the order of Move
+_SHIFTS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+class Symmetry(NamedTuple):
+    # the tile of cell i goes to cells[i] and becomes tiles[tile], forward
+    # translates the moves of a board into the moves of its image, backward
+    # the other way around
+    cells: tuple[int, ...]
+    tiles: tuple[int, ...]
+    forward: dict[int, int]
+    backward: dict[int, int]
+
+
+@lru_cache(maxsize=None)
+def symmetries(n: int, goal: tuple[int, ...]) -> tuple[Symmetry, ...]:
+    # the symmetries of the square that keep the empty tile of the goal in
+    # place, relabeled so that the goal is its own image: a board and its
+    # image have solutions of the same length, one move for one move
+    shape = (n, n)
+    blank = goal.index(EMPTY_TILE)
+    result: list[Symmetry] = []
+    for transform in _SQUARE:
+        cells = tuple(
+            coor_to_index(transform(*index_to_coor(i, shape), n), shape)
+            for i in range(n * n)
+        )
+        if cells[blank] != blank:
+            continue
+        tiles = [EMPTY_TILE] * (n * n)
+        for i, tile in enumerate(goal):
+            tiles[tile] = goal[cells[i]]
+        x, y = transform(1, 1, n)
+        letters = ""
+        for dx, dy in _SHIFTS:
+            moved_x, moved_y = transform(1 + dx, 1 + dy, n)
+            letters += MOVE_LETTERS[_SHIFTS.index((moved_x - x, moved_y - y))]
+        result.append(
+            Symmetry(
+                cells,
+                tuple(tiles),
+                str.maketrans(MOVE_LETTERS, letters),
+                str.maketrans(letters, MOVE_LETTERS),
+            )
+        )
+    return tuple(result)
+
+
+def canonical(puzzle: Npuzzle, goal: Npuzzle) -> tuple[PackedState, Symmetry]:
+    # the smallest image of the board, and the symmetry giving it
+    best: tuple[PackedState, Symmetry] | None = None
+    for symmetry in symmetries(goal.n, tuple(goal.tiles)):
+        tiles = [EMPTY_TILE] * len(puzzle.tiles)
+        for i, tile in enumerate(puzzle.tiles):
+            tiles[symmetry.cells[i]] = symmetry.tiles[tile]
+        key = PackedState.from_tiles(puzzle.n, tiles)
+        if best is None or key.key < best[0].key:  # type: ignore
+            best = (key, symmetry)
+    assert best is not None
+    return best
+
+
+def leads_to(start: Npuzzle, goal: Npuzzle, moves: str) -> bool:
+    board = Npuzzle.trusted(start.n, start.tiles.copy(), start.blank)
+    for letter in moves:
+        if letter not in MOVE_LETTERS or not board.make_move(
+            Move(MOVE_LETTERS.index(letter))
+        ):
+            return False
+    return board == goal
+
+
+class SolutionCache:
+    # solutions keyed by the canonical board, the goal, whether they are
+    # optimal and a scope, only the lookups of the same scope see them: the
+    # most recent ones in memory, all of them in a sqlite file that survives
+    # restarts (none when path is None). The file is shared by the processes
+    # of a pool, the memory isn't
+    def __init__(
+        self, path: str | None = CACHE_FILE, size: int = DEFAULT_CACHE_SIZE
+    ) -> None:
+        self.path = path
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.__entries: OrderedDict[Entry, str] = OrderedDict()
+        self.__db: sqlite3.Connection | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"path": self.path, "size": self.size}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(state["path"], state["size"])  # type: ignore
+
+    def __connect(self) -> sqlite3.Connection | None:
+        if self.path is None:
+            return None
+        if self.__db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.__db = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT)
+            self.__db.execute(_SCHEMA)
+        return self.__db
+
+    def __remember(self, entry: Entry, moves: str) -> None:
+        known = self.__entries.get(entry)
+        if known is None or len(moves) < len(known):
+            self.__entries[entry] = moves
+        self.__entries.move_to_end(entry)
+        while len(self.__entries) > self.size:
+            self.__entries.popitem(last=False)
+
+    def __lookup(
+        self, key: PackedState, goal: PackedState, optimal: bool, scope: str
+    ) -> str | None:
+        # an optimal solution also answers who doesn't need one
+        for accepted in (True,) if optimal else (True, False):
+            moves = self.__entries.get((key, goal, accepted, scope))
+            if moves is not None:
+                self.__entries.move_to_end((key, goal, accepted, scope))
+                return moves
+
+        db = self.__connect()
+        if db is None:
+            return None
+        row = db.execute(
+            "SELECT moves, optimal FROM solutions WHERE board = ? AND goal = ?"
+            " AND optimal >= ? AND scope = ? ORDER BY optimal DESC LIMIT 1",
+            (bytes(key.tiles), bytes(goal.tiles), int(optimal), scope),
+        ).fetchone()
+        if row is None:
+            return None
+        self.__remember((key, goal, bool(row[1]), scope), row[0])
+        return row[0]
+
+    def get(
+        self, start: Npuzzle, goal: Npuzzle, optimal: bool = True, scope: str = ""
+    ) -> str | None:
+        # the moves of the empty tile from start to goal, if start or one of
+        # its images is known
+        key, symmetry = canonical(start, goal)
+        moves = self.__lookup(key, GoalTable.of(goal).key, optimal, scope)
+        if moves is not None:
+            moves = moves.translate(symmetry.backward)
+            # a file written by another version may not be trusted
+            if leads_to(start, goal, moves):
+                self.hits += 1
+                return moves
+        self.misses += 1
+        return None
+
+    def put(
+        self,
+        start: Npuzzle,
+        goal: Npuzzle,
+        moves: str,
+        optimal: bool,
+        scope: str = "",
+    ) -> None:
+        key, symmetry = canonical(start, goal)
+        goal_key = GoalTable.of(goal).key
+        moves = moves.translate(symmetry.forward)
+        self.__remember((key, goal_key, optimal, scope), moves)
+
+        db = self.__connect()
+        if db is None:
+            return
+        # a shorter solution replaces the known one
+        with db:
+            db.execute(
+                "INSERT INTO solutions VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (board, goal, optimal, scope)"
+                " DO UPDATE SET moves = excluded.moves"
+                " WHERE length(excluded.moves) < length(solutions.moves)",
+                (bytes(key.tiles), bytes(goal_key.tiles), int(optimal), scope, moves),
+            )
+
+    def __len__(self) -> int:
+        db = self.__connect()
+        if db is None:
+            return len(self.__entries)
+        return db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self) -> None:
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
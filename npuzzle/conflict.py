@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import bisect
+import itertools
+from functools import lru_cache
+from typing import Sequence
+
+from npuzzle.npuzzle import EMPTY_TILE
+
+# every line of a board of this size or smaller is precomputed
+MAX_TABLE_N = 7
+
+
+# A line (row or column) is keyed by what each of its cells holds: 0 when the
+# tile doesn't belong to this line in the goal, 1 + its goal index in the line
+# otherwise. Cell i of the line is the i-th digit of the key in base n + 1.
+
+
+def line_key(
+    tiles: list[int],
+    cells: Sequence[int],
+    goal_lines: Sequence[int],
+    goal_indexes: Sequence[int],
+    line: int,
+) -> int:
+    base = len(cells) + 1
+    key = 0
+    for cell in reversed(cells):
+        tile = tiles[cell]
+        key *= base
+        if tile != EMPTY_TILE and goal_lines[tile] == line:
+            key += goal_indexes[tile] + 1
+    return key
+
+
+def conflicts(values: Sequence[int]) -> int:
+    # the tiles to take out of the line so that the others are in order: all
+    # but the longest increasing subsequence
+    tails: list[int] = []
+    for value in values:
+        i = bisect.bisect_left(tails, value)
+        if i == len(tails):
+            tails.append(value)
+        else:
+            tails[i] = value
+    return len(values) - len(tails)
+
+
+class ConflictTable(dict):
+    def __init__(self, n: int) -> None:
+        super().__init__()
+        self.n = n
+
+    def __missing__(self, key: int) -> int:
+        values: list[int] = []
+        rest = key
+        while rest:
+            rest, value = divmod(rest, self.n + 1)
+            if value:
+                values.append(value)
+        result = self[key] = conflicts(values)
+        return result
+
+
+@lru_cache(maxsize=None)
+def conflict_table(n: int) -> ConflictTable:
+    # bigger boards have too many lines, they are counted the first time seen
+    table = ConflictTable(n)
+    if n > MAX_TABLE_N:
+        return table
+
+    weights = [(n + 1) ** i for i in range(n)]
+    for k in range(n + 1):
+        for cells in itertools.combinations(range(n), k):
+            for values in itertools.permutations(range(1, n + 1), k):
+                key = sum(value * weights[cell] for cell, value in zip(cells, values))
+                table[key] = conflicts(values)
+    return table
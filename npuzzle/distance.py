@@ -1,9 +1,22 @@
 from __future__ import annotations
 
-from typing import Protocol, Type
+import os
+from typing import Protocol, Type, cast
 
+from npuzzle.conflict import conflict_table, line_key
+from npuzzle.goal import GoalTable
 from npuzzle.npuzzle import EMPTY_TILE, Npuzzle
-from npuzzle.utils import index_to_coor
+from npuzzle.oracle import load
+from npuzzle.pdb import (
+    PDB_DIRECTORY,
+    Partition,
+    PatternDatabaseError,
+    PatternDatabaseFile,
+    database_path,
+    default_partition,
+)
+from npuzzle.state import PackedState
+from npuzzle.walking import WalkingTable, key_of, move_key, walking_table
 
 
 class Distance(Protocol):
@@ -11,86 +24,279 @@ class Distance(Protocol):
         ...
 
 
+class IncrementalDistance(Distance, Protocol):
+    # h of a state in which tile just slid from src to dst, knowing the h
+    # of the previous state
+    def update(
+        self, h: int, tile: int, src: int, dst: int, state: Npuzzle, goal: Npuzzle
+    ) -> int:
+        ...
+
+
+def is_incremental(distance: Distance) -> bool:
+    return callable(getattr(distance, "update", None))
+
+
+def successor_distance(
+    distance: Distance, h: int, parent: Npuzzle, child: Npuzzle, goal: Npuzzle
+) -> int:
+    if not is_incremental(distance):
+        return distance.compute(child, goal)
+    dst = parent.blank
+    return cast(IncrementalDistance, distance).update(
+        h, child.tiles[dst], child.blank, dst, child, goal
+    )
+
+
 class Manhattan:
+    def update(
+        self, h: int, tile: int, src: int, dst: int, state: Npuzzle, goal: Npuzzle
+    ) -> int:
+        dist = GoalTable.of(goal).dist[tile]
+        return h - dist[src] + dist[dst]
+
     def compute(self, src: Npuzzle, dst: Npuzzle) -> int:
-        distance = 0
-        for i, tile in enumerate(src.tiles):
-            if tile == EMPTY_TILE:
-                continue
-            dst_index = dst.tiles.index(tile)
-            src_x, src_y = index_to_coor(i, (src.n, src.n))
-            dst_x, dst_y = index_to_coor(dst_index, (dst.n, dst.n))
-            distance += abs(src_x - dst_x)
-            distance += abs(src_y - dst_y)
-        return distance
+        dist = GoalTable.of(dst).dist
+        return sum(dist[tile][i] for i, tile in enumerate(src.tiles))
 
 
 class TilesOutOfPlace:
+    def update(
+        self, h: int, tile: int, src: int, dst: int, state: Npuzzle, goal: Npuzzle
+    ) -> int:
+        src_goal = goal.tiles[src]
+        dst_goal = goal.tiles[dst]
+        before = (src_goal != tile) + (dst_goal != EMPTY_TILE)
+        after = (src_goal != EMPTY_TILE) + (dst_goal != tile)
+        return h - before + after
+
     def compute(self, src: Npuzzle, dst: Npuzzle) -> int:
-        return sum(a != b for a, b in zip(src.tiles, dst.tiles))
+        return sum(a != b for a, b in zip(src.tiles, GoalTable.of(dst).tiles))
 
 
 class TilesOutOfRowCol:
+    @staticmethod
+    def __misplacement(tile: int, cell: int, table: GoalTable) -> int:
+        y, x = divmod(cell, table.n)
+        return (y != table.row[tile]) + (x != table.col[tile])
+
+    def update(
+        self, h: int, tile: int, src: int, dst: int, state: Npuzzle, goal: Npuzzle
+    ) -> int:
+        table = GoalTable.of(goal)
+        before = self.__misplacement(tile, src, table) + self.__misplacement(
+            EMPTY_TILE, dst, table
+        )
+        after = self.__misplacement(tile, dst, table) + self.__misplacement(
+            EMPTY_TILE, src, table
+        )
+        return h - before + after
+
     def compute(self, src: Npuzzle, dst: Npuzzle) -> int:
-        src_rows: list[list[int]] = []
-        dst_rows: list[list[int]] = []
-        src_cols: list[list[int]] = []
-        dst_cols: list[list[int]] = []
-        for i in range(src.n):
-            src_rows.append(src.tiles[i * src.n : (i + 1) * src.n])
-            src_cols.append(src.tiles[i :: src.n])
-            dst_rows.append(dst.tiles[i * src.n : (i + 1) * src.n])
-            dst_cols.append(dst.tiles[i :: src.n])
-
-        distance = 0
-        for src_row, dst_row in zip(src_rows, dst_rows):
-            distance += sum(tile not in dst_row for tile in src_row)
-        for src_col, dst_col in zip(src_cols, dst_cols):
-            distance += sum(tile not in dst_col for tile in src_col)
-
-        return distance
-
-
-# TODO
+        table = GoalTable.of(dst)
+        return sum(
+            self.__misplacement(tile, i, table) for i, tile in enumerate(src.tiles)
+        )
+
+
 class LinearConflict:
-    def __count_conflict(self, src_row: list[int], dst_row: list[int]) -> int:
-        conflict = 0
+    # two tiles of their goal line in the reverse order can't both stay in it,
+    # every tile that has to leave the line costs 2 moves on top of Manhattan
+    @staticmethod
+    def __row(n: int, line: int) -> range:
+        return range(line * n, (line + 1) * n)
+
+    @staticmethod
+    def __col(n: int, line: int) -> range:
+        return range(line, n * n, n)
 
-        for j in range(len(src_row)):
-            if src_row[j] == EMPTY_TILE or src_row[j] not in dst_row:
-                continue
-            for k in range(j + 1, len(src_row)):
-                if src_row[k] == EMPTY_TILE or src_row[k] not in dst_row:
-                    continue
-                goal_k_index = dst_row.index(src_row[k])
-                if j == goal_k_index:
-                    conflict += 1
+    def update(
+        self, h: int, tile: int, src: int, dst: int, state: Npuzzle, goal: Npuzzle
+    ) -> int:
+        # the tile keeps its order in the line it moved along, so only the
+        # two lines across the move change
+        n = state.n
+        table = GoalTable.of(goal)
+        conflicts = conflict_table(n)
+        if src % n == dst % n:
+            cells, goal_lines, goal_indexes = self.__row, table.row, table.col
+            src_line, dst_line, index = src // n, dst // n, src % n
+        else:
+            cells, goal_lines, goal_indexes = self.__col, table.col, table.row
+            src_line, dst_line, index = src % n, dst % n, src // n
 
-        return conflict
+        src_key = line_key(
+            state.tiles, cells(n, src_line), goal_lines, goal_indexes, src_line
+        )
+        dst_key = line_key(
+            state.tiles, cells(n, dst_line), goal_lines, goal_indexes, dst_line
+        )
+        digit = (goal_indexes[tile] + 1) * (n + 1) ** index
+        before = conflicts[src_key + digit * (goal_lines[tile] == src_line)]
+        before += conflicts[dst_key - digit * (goal_lines[tile] == dst_line)]
+        after = conflicts[src_key] + conflicts[dst_key]
+
+        dist = table.dist[tile]
+        return h - dist[src] + dist[dst] + 2 * (after - before)
 
     def compute(self, src: Npuzzle, dst: Npuzzle) -> int:
-        src_rows: list[list[int]] = []
-        dst_rows: list[list[int]] = []
-        src_cols: list[list[int]] = []
-        dst_cols: list[list[int]] = []
-        for i in range(src.n):
-            src_rows.append(src.tiles[i * src.n : (i + 1) * src.n])
-            src_cols.append(src.tiles[i :: src.n])
-            dst_rows.append(dst.tiles[i * src.n : (i + 1) * src.n])
-            dst_cols.append(dst.tiles[i :: src.n])
+        n = src.n
+        table = GoalTable.of(dst)
+        conflicts = conflict_table(n)
 
         conflict = 0
-        for i in range(src.n):
-            conflict += self.__count_conflict(src_rows[i], dst_rows[i])
-            conflict += self.__count_conflict(src_cols[i], dst_cols[i])
+        for line in range(n):
+            conflict += conflicts[
+                line_key(src.tiles, self.__row(n, line), table.row, table.col, line)
+            ]
+            conflict += conflicts[
+                line_key(src.tiles, self.__col(n, line), table.col, table.row, line)
+            ]
+
+        dist = table.dist
+        manhattan = sum(dist[tile][i] for i, tile in enumerate(src.tiles))
+        return manhattan + 2 * conflict
+
+
+class PatternDatabase:
+    def __init__(
+        self, partition: Partition | None = None, directory: str = PDB_DIRECTORY
+    ) -> None:
+        self.partition = partition
+        self.directory = directory
+        self.__databases: dict[PackedState, PatternDatabaseFile] = {}
+
+    def __database(self, goal: Npuzzle) -> PatternDatabaseFile:
+        table = GoalTable.of(goal)
+        database = self.__databases.get(table.key)
+        if database is None:
+            partition = self.partition
+            if partition is None:
+                partition = default_partition(table.n)
+            path = database_path(table, partition, self.directory)
+            # building one takes minutes, and processes of a pool would
+            # all build the same one: it is a step of its own
+            if not os.path.exists(path):
+                raise PatternDatabaseError(
+                    path, message="No pattern database, build it with --build-pdb"
+                )
+            database = PatternDatabaseFile(path)
+            if database.goal != table.tiles:
+                raise PatternDatabaseError(path, message="Unexpected goal")
+            self.__databases[table.key] = database
+        return database
 
-        return Manhattan().compute(src, dst) + 2 * conflict
+    def update(
+        self, h: int, tile: int, src: int, dst: int, state: Npuzzle, goal: Npuzzle
+    ) -> int:
+        database = self.__database(goal)
+        group = database.group_of[tile]
+        if group < 0:
+            return h
+
+        # only the group of the tile changes, by one digit of its index
+        tiles = state.tiles
+        after = database.index([tiles.index(other) for other in database.groups[group]])
+        before = after - (dst - src) * database.weight[tile]
+        return h - database.entry(group, before) + database.entry(group, after)
+
+    def compute(self, src: Npuzzle, dst: Npuzzle) -> int:
+        return self.__database(dst).evaluate(src.tiles)
+
+
+class WalkingH(int):
+    # a walking distance that remembers the configurations of its rows and
+    # of its columns, and the distance of the former, so that the next one
+    # only moves a tile in one of them
+    rows: int
+    cols: int
+    rows_h: int
+
+
+def walking_h(rows_h: int, cols_h: int, rows: int, cols: int) -> WalkingH:
+    h = WalkingH(rows_h + cols_h)
+    h.rows = rows
+    h.cols = cols
+    h.rows_h = rows_h
+    return h
+
+
+class WalkingDistance:
+    def __init__(self, directory: str | None = PDB_DIRECTORY) -> None:
+        self.directory = directory
+
+    def __tables(self, goal: GoalTable) -> tuple[WalkingTable, WalkingTable]:
+        blank = goal.position[EMPTY_TILE]
+        return (
+            walking_table(goal.n, blank // goal.n, self.directory),
+            walking_table(goal.n, blank % goal.n, self.directory),
+        )
+
+    @staticmethod
+    def __counts(
+        tiles: list[int], goal_lines: tuple[int, ...], n: int, rows: bool
+    ) -> tuple[list[int], int]:
+        counts = [0] * (n * n)
+        blank = 0
+        for cell, tile in enumerate(tiles):
+            line = cell // n if rows else cell % n
+            if tile == EMPTY_TILE:
+                blank = line
+            else:
+                counts[line * n + goal_lines[tile]] += 1
+        return counts, blank
+
+    def update(
+        self, h: int, tile: int, src: int, dst: int, state: Npuzzle, goal: Npuzzle
+    ) -> int:
+        # only the configuration of the dimension the tile moved along changes
+        if not isinstance(h, WalkingH):
+            return self.compute(state, goal)
+        n = state.n
+        table = GoalTable.of(goal)
+        rows, cols = self.__tables(table)
+        if src % n == dst % n:
+            key = move_key(h.rows, n, table.row[tile], src // n, dst // n)
+            return walking_h(rows.lookup(key), h - h.rows_h, key, h.cols)
+        key = move_key(h.cols, n, table.col[tile], src % n, dst % n)
+        return walking_h(h.rows_h, cols.lookup(key), h.rows, key)
+
+    def compute(self, src: Npuzzle, dst: Npuzzle) -> int:
+        n = src.n
+        table = GoalTable.of(dst)
+        rows, cols = self.__tables(table)
+        row_key = key_of(*self.__counts(src.tiles, table.row, n, True), n)
+        col_key = key_of(*self.__counts(src.tiles, table.col, n, False), n)
+        return walking_h(rows.lookup(row_key), cols.lookup(col_key), row_key, col_key)
+
+
+class ExactDistance:
+    # the length of an optimal solution, read from the table of the oracle,
+    # so only for the 3x3 puzzle
+    def __init__(self, directory: str = PDB_DIRECTORY) -> None:
+        self.directory = directory
+
+    def compute(self, src: Npuzzle, dst: Npuzzle) -> int:
+        distance = load(GoalTable.of(dst), self.directory).distance(src.tiles)
+        return 0 if distance is None else distance
 
 
 AVAILABLE_HEURISTICS: list[Type[Distance]] = [
     Manhattan,
     TilesOutOfPlace,
     TilesOutOfRowCol,
+    LinearConflict,
+    PatternDatabase,
+    WalkingDistance,
+    ExactDistance,
 ]
 
+# they count the empty tile, so that they may overestimate and cost the
+# solvers their optimality
+INADMISSIBLE_HEURISTICS: list[Type[Distance]] = [TilesOutOfPlace, TilesOutOfRowCol]
+
+# read from tables built for a goal, they can't estimate the distance to
+# any other state
+GOAL_TABLE_HEURISTICS: list[Type[Distance]] = [PatternDatabase, ExactDistance]
+
 DEFAULT_HEURISTIC: Type[Distance] = Manhattan
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from npuzzle.state import PackedState
+from npuzzle.utils import snail_array
+
+if TYPE_CHECKING:
+    from npuzzle.npuzzle import Npuzzle
+
+# goal tables kept at most, the bidirectional search and the cache make one
+# for each start
+GOAL_TABLES = 64
+
+
+class Layout(Enum):
+    SNAIL = "snail"
+    ROW_MAJOR = "row-major"
+
+
+@lru_cache(maxsize=None)
+def _layout_tiles(n: int, layout: Layout) -> tuple[int, ...]:
+    if layout == Layout.SNAIL:
+        return tuple(snail_array(n))
+    return (*range(1, n * n), 0)
+
+
+def goal_tiles(n: int, layout: Layout = Layout.SNAIL) -> list[int]:
+    return list(_layout_tiles(n, layout))
+
+
+@dataclass(frozen=True)
+class GoalTable:
+    n: int
+    key: PackedState
+    tiles: tuple[int, ...]
+    # indexed by tile
+    position: tuple[int, ...]
+    row: tuple[int, ...]
+    col: tuple[int, ...]
+    # dist[tile][cell] is the manhattan distance of tile in cell, 0 for the empty tile
+    dist: tuple[tuple[int, ...], ...]
+
+    @staticmethod
+    def of(goal: Npuzzle) -> GoalTable:
+        # a pinned goal carries its table, the others are keyed by value, so
+        # that a goal that was changed or another one with the same tiles gets
+        # the right table
+        table = goal.pinned_table
+        if table is None:
+            table = goal_table(goal.n, tuple(goal.tiles))
+        return table
+
+    @staticmethod
+    def pin(goal: Npuzzle) -> Npuzzle:
+        # a copy of the goal carrying its table, so that the heuristics of a
+        # search read it in O(1). The copy belongs to the search, nobody
+        # changes it behind the table
+        if goal.pinned_table is not None:
+            return goal
+        pinned = type(goal).trusted(goal.n, goal.tiles.copy(), goal.blank)
+        pinned.pinned_table = GoalTable.of(goal)
+        return pinned
+
+    @staticmethod
+    def from_layout(n: int, layout: Layout = Layout.SNAIL) -> GoalTable:
+        return goal_table(n, _layout_tiles(n, layout))
+
+
+@lru_cache(maxsize=GOAL_TABLES)
+def goal_table(n: int, tiles: tuple[int, ...]) -> GoalTable:
+    position = [0] * (n * n)
+    for i, tile in enumerate(tiles):
+        position[tile] = i
+    row = tuple(i // n for i in position)
+    col = tuple(i % n for i in position)
+
+    dist = tuple(
+        tuple(
+            0 if tile == 0 else abs(cell // n - row[tile]) + abs(cell % n - col[tile])
+            for cell in range(n * n)
+        )
+        for tile in range(n * n)
+    )
+
+    return GoalTable(
+        n=n,
+        key=PackedState.from_tiles(n, list(tiles)),
+        tiles=tiles,
+        position=tuple(position),
+        row=row,
+        col=col,
+        dist=dist,
+    )
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import queue
+import zlib
+from typing import Any, List, Optional, Tuple
+
+from npuzzle.distance import Distance, successor_distance
+from npuzzle.node import COST, Node
+from npuzzle.npuzzle import Npuzzle
+from npuzzle.openlist import DEFAULT_OPEN_LIST, OpenList
+from npuzzle.report import Instrumentation, Report, ReportManager
+from npuzzle.state import Key, PackedState
+
+# kinds of the messages a worker handles
+NODES = 0
+PARENT = 1
+STOP = 2
+
+# expansions between two looks at the inbox, the outboxes are flushed after
+EXPANSIONS_PER_ROUND = 64
+# seconds between two termination checks
+POLL_INTERVAL = 0.001
+
+# a generated state: its key, g, h and the key of its parent
+Entry = Tuple[Key, int, int, Optional[Key]]
+Batch = List[Entry]
+
+
+class WorkerError(Exception):
+    """Exception raised when a worker process stopped unexpectedly."""
+
+    def __init__(self, exitcode: int | None, message: str = "A worker died") -> None:
+        self.exitcode = exitcode
+        self.message = f"{message}. (exit code {self.exitcode} here)"
+        super().__init__(self.message)
+
+
+def owner(key: Key, jobs: int) -> int:
+    # must be the same in every process, which hash() isn't for bytes
+    if isinstance(key, int):
+        return (((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32) % jobs
+    return zlib.crc32(key) % jobs
+
+
+class HashWorker:
+    # owns the states hashed to index: their open list, closed set and parent
+    def __init__(
+        self,
+        index: int,
+        distance: Distance,
+        goal: Npuzzle,
+        inboxes: list[Any],
+        results: Any,
+        shared: dict[str, Any],
+        instrumentation: Instrumentation,
+    ) -> None:
+        self.index = index
+        self.jobs = len(inboxes)
+        self.distance = distance
+        self.goal = goal
+        self.goal_key = goal.pack().key
+        self.inboxes = inboxes
+        self.results = results
+        self.sent = shared["sent"]
+        self.received = shared["received"]
+        self.idle = shared["idle"]
+        self.incumbent = shared["incumbent"]
+        self.expanded_counts = shared["expanded"]
+        self.frontiers = shared["frontier"]
+        self.open: OpenList = DEFAULT_OPEN_LIST()
+        self.close: dict[PackedState, Node] = {}
+        self.parents: dict[Key, Key | None] = {}
+        self.outboxes: list[Batch] = [[] for _ in range(self.jobs)]
+        self.report: Report = Report(author=f"HashWorker {index}")
+        ReportManager.instrument(self, instrumentation)
+        # what the wrappers count, for the counters instrumentation
+        self.counting = instrumentation is Instrumentation.COUNTERS
+        self.expanded = 0
+        self.peak = 0
+
+    def __busy(self) -> bool:
+        # nodes with f >= the cost of the best solution are useless
+        bound = self.incumbent.value
+        while self.open and self.open.top() >= bound:
+            self.__drop_from_open()
+        return bool(self.open)
+
+    def __receive(self, key: Key, g: int, h: int, parent: Key | None) -> None:
+        if g + h >= self.incumbent.value:
+            return
+        state = PackedState(self.goal.n, key)
+        known = self.close.get(state)
+        if known is not None:
+            if known.g <= g:
+                return
+            self.__remove_from_close(known)
+
+        node = Node(state)
+        known = self.open.get(node)
+        if known is not None and known.g <= g:
+            return
+        node.g = g
+        node.h = h
+        self.parents[key] = parent
+        if known is None:
+            self.__add_to_open(node)
+        else:
+            self.__update_open(node)
+
+    def __expand(self) -> None:
+        if self.counting:
+            size = len(self.open) + len(self.close)
+            if size > self.peak:
+                self.peak = size
+        current = self.__remove_from_open()
+        self.expanded += 1
+        self.__add_to_close(current)
+        key = current.key.key
+        if key == self.goal_key:
+            if current.g < self.incumbent.value:
+                self.incumbent.value = current.g
+            return
+
+        parent = self.parents[key]
+        g = current.g + COST
+        state = current.state
+        for _, successor in state.expand():
+            successor_key = successor.pack().key
+            if successor_key == parent:
+                continue
+            h = successor_distance(
+                self.distance, current.h, state, successor, self.goal
+            )
+            if g + h >= self.incumbent.value:
+                continue
+            # only the states owned by other workers wait for the next flush
+            i = owner(successor_key, self.jobs)
+            if i == self.index:
+                self.__receive(successor_key, g, h, key)
+            else:
+                self.outboxes[i].append((successor_key, g, h, key))
+
+    def __publish(self) -> None:
+        # for the budget, checked by the parent against the sums
+        self.expanded_counts[self.index] = self.expanded
+        self.frontiers[self.index] = len(self.open)
+
+    def __flush(self) -> None:
+        for i, batch in enumerate(self.outboxes):
+            if batch:
+                self.outboxes[i] = []
+                # counted before it can be received, for the termination check
+                self.sent[self.index] += 1
+                self.inboxes[i].put((NODES, batch))
+
+    def __handle(self, message: tuple[int, Any]) -> bool:
+        kind, payload = message
+        if kind == NODES:
+            self.idle[self.index] = 0
+            for entry in payload:
+                self.__receive(*entry)
+            self.received[self.index] += 1
+        elif kind == PARENT:
+            self.results.put((PARENT, payload, self.parents.get(payload)))
+        else:
+            self.report.flush(self.expanded, self.peak)
+            self.results.put(
+                (
+                    STOP,
+                    self.report.time_complexity,
+                    self.report.size_complexity,
+                )
+            )
+            return False
+        return True
+
+    def run(self) -> None:
+        inbox = self.inboxes[self.index]
+        while True:
+            if self.__busy():
+                try:
+                    while True:
+                        if not self.__handle(inbox.get_nowait()):
+                            return
+                except queue.Empty:
+                    pass
+                for _ in range(EXPANSIONS_PER_ROUND):
+                    if not self.__busy():
+                        break
+                    self.__expand()
+                self.__publish()
+                self.__flush()
+            else:
+                self.__publish()
+                self.__flush()
+                self.idle[self.index] = 1
+                if not self.__handle(inbox.get()):
+                    return
+
+    @ReportManager.balance(1)
+    def __add_to_open(self, node: Node) -> None:
+        self.open.push(node, node.f)
+
+    def __update_open(self, node: Node) -> None:
+        self.open.push(node, node.f)
+
+    @ReportManager.balance(1)
+    def __add_to_close(self, node: Node) -> None:
+        self.close[node.key] = node
+
+    @ReportManager.balance(-1)
+    @ReportManager.count
+    def __remove_from_open(self) -> Node:
+        return self.open.pop()
+
+    @ReportManager.balance(-1)
+    def __drop_from_open(self) -> Node:
+        return self.open.pop()
+
+    @ReportManager.balance(-1)
+    def __remove_from_close(self, node: Node) -> None:
+        del self.close[node.key]
+
+
+def run_worker(
+    index: int,
+    distance: Distance,
+    goal: Npuzzle,
+    inboxes: list[Any],
+    results: Any,
+    shared: dict[str, Any],
+    instrumentation: Instrumentation,
+) -> None:
+    HashWorker(index, distance, goal, inboxes, results, shared, instrumentation).run()
+
+
+def terminated(shared: dict[str, Any], injected: int) -> bool:
+    # four counters: two waves with every worker idle, the same counts in
+    # both and as many batches received as sent (injected by the caller)
+    def wave() -> tuple[list[int], list[int], list[int]]:
+        return list(shared["idle"]), list(shared["sent"]), list(shared["received"])
+
+    first = wave()
+    idle, sent, received = first
+    if not all(idle) or sum(sent) + injected != sum(received):
+        return False
+    return wave() == first
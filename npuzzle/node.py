@@ -1,52 +1,114 @@
 from __future__ import annotations
 
-from npuzzle.npuzzle import Npuzzle
+from npuzzle.npuzzle import EMPTY_TILE, Move, Npuzzle, blank_moves
+from npuzzle.state import PackedState
 
 COST = 1
 
 
 class Node:
-    def __init__(self, state: Npuzzle) -> None:
-        self.state = state
+    # only the packed board is kept, the Npuzzle is rebuilt when needed
+    __slots__ = ("key", "g", "h", "parent", "move")
+
+    key: PackedState
+    g: int
+    h: int
+    parent: Node | None
+    move: Move | None
+
+    def __init__(
+        self,
+        state: Npuzzle | PackedState,
+        parent: Node | None = None,
+        move: Move | None = None,
+    ) -> None:
+        self.key = state if isinstance(state, PackedState) else state.pack()
         self.g = 0
         self.h = 0
-        self.parent: Node | None = None
+        self.parent = parent
+        self.move = move
+
+    @classmethod
+    def from_moves(cls, start: Npuzzle, moves: list[Move]) -> Node:
+        node = cls(start)
+        state = Npuzzle.trusted(start.n, start.tiles.copy(), start.blank)
+        for move in moves:
+            state.make_move(move)
+            child = cls(state, node, move)
+            child.g = node.g + COST
+            node = child
+        return node
+
+    @classmethod
+    def from_keys(cls, keys: list[PackedState]) -> Node:
+        # the move between two consecutive states is found from their blanks
+        node = cls(keys[0])
+        blank = keys[0].tiles.index(EMPTY_TILE)
+        for key in keys[1:]:
+            child_blank = key.tiles.index(EMPTY_TILE)
+            for move, cell in blank_moves(key.n)[blank]:
+                if cell == child_blank:
+                    child = cls(key, node, move)
+                    child.g = node.g + COST
+                    node = child
+            blank = child_blank
+        return node
+
+    @property
+    def state(self) -> Npuzzle:
+        return Npuzzle.from_packed(self.key)
 
     @property
     def f(self) -> int:
         return self.g + self.h
 
     def __repr__(self) -> str:
-        return f"Node({self.state!r}, f={self.f}, g={self.g}, h={self.h}, {self.parent}, @{hex(id(self))})"
+        return f"Node({self.state!r}, f={self.f}, g={self.g}, h={self.h}, {self.move}, {self.parent}, @{hex(id(self))})"
 
     def __lt__(self, other: Node) -> bool:
         return self.f < other.f
 
     def __eq__(self, other: Node) -> bool:
-        return self.__hash__() == other.__hash__()
+        return self.key == other.key
 
     def __hash__(self) -> int:
-        return hash(tuple(self.state.tiles))
+        return hash(self.key)
+
+    def expand(self, state: Npuzzle | None = None) -> list[tuple[Node, Npuzzle]]:
+        # the children come with their board, which the caller often needs
+        if state is None:
+            state = self.state
+        return [(Node(child, self, move), child) for move, child in state.expand()]
 
     @property
     def successors(self) -> list[Node]:
-        return [Node(state) for state in self.state.successors]
-
-    def display_genealogy(self, ascending: bool = True) -> None:
-        if ascending:
-            print(self.state, end="\n\n")
+        return [node for node, _ in self.expand()]
 
-        if not self.parent is None:
-            self.parent.display_genealogy(ascending=ascending)
+    @property
+    def moves(self) -> list[Move]:
+        moves: list[Move] = []
+        node: Node | None = self
+        while node is not None and node.move is not None:
+            moves.append(node.move)
+            node = node.parent
+        moves.reverse()
+        return moves
 
+    def display_genealogy(self, ascending: bool = True) -> None:
+        nodes: list[Node] = []
+        node: Node | None = self
+        while node is not None:
+            nodes.append(node)
+            node = node.parent
         if not ascending:
-            print(self.state, end="\n\n")
-
-    def get_genealogy_size(self) -> int | float:
-        try:
-            if self.parent is None:
-                return 0
-            else:
-                return self.parent.get_genealogy_size() + 1
-        except RecursionError:
-            return float("-inf")
+            nodes.reverse()
+        for node in nodes:
+            print(node.state, end="\n\n")
+
+    def get_genealogy_size(self) -> int:
+        size = 0
+        node = self
+        while node.parent is not None:
+            size += 1
+            node = node.parent
+        return size
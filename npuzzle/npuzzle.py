@@ -1,16 +1,12 @@
 from __future__ import annotations
 
-import copy
 import random
 from enum import IntEnum, auto
+from functools import lru_cache
 
-from npuzzle.utils import (
-    coor_in_list,
-    coor_to_index,
-    index_in_list,
-    index_to_coor,
-    snail_array,
-)
+from npuzzle.goal import GoalTable, Layout, goal_tiles
+from npuzzle.state import PackedState
+from npuzzle.utils import count_inversions, index_to_coor
 
 EMPTY_TILE = 0
 MIN_N_VALUE = 3
@@ -23,6 +19,37 @@ class Move(IntEnum):
     DOWN = auto()
     LEFT = auto()
 
+    @property
+    def inverse(self) -> Move:
+        return Move((self + 2) % len(Move))
+
+    @property
+    def letter(self) -> str:
+        return MOVE_LETTERS[self]
+
+
+# moves of the empty tile, in the order of Move
+MOVE_LETTERS = "URDL"
+
+
+@lru_cache(maxsize=None)
+def blank_moves(n: int) -> tuple[tuple[tuple[Move, int], ...], ...]:
+    # for each position of the empty tile, the legal moves and where it lands
+    table: list[tuple[tuple[Move, int], ...]] = []
+    for index in range(n * n):
+        x, y = index_to_coor(index, (n, n))
+        moves: list[tuple[Move, int]] = []
+        if y > 0:
+            moves.append((Move.UP, index - n))
+        if x < n - 1:
+            moves.append((Move.RIGHT, index + 1))
+        if y < n - 1:
+            moves.append((Move.DOWN, index + n))
+        if x > 0:
+            moves.append((Move.LEFT, index - 1))
+        table.append(tuple(moves))
+    return tuple(table)
+
 
 class NNotInRangeError(Exception):
     """Exception raised when n is not between MIN_N_VALUE and MAX_N_VALUE."""
@@ -49,6 +76,9 @@ class TilesFormatError(Exception):
 
 
 class Npuzzle:
+    # the table of the goals pinned by a search, see GoalTable.pin
+    pinned_table: GoalTable | None = None
+
     def __init__(self, n: int, tiles: list[int]) -> None:
         if n < MIN_N_VALUE or n > MAX_N_VALUE:
             raise NNotInRangeError(n)
@@ -61,13 +91,30 @@ class Npuzzle:
             raise TilesFormatError(
                 tiles, message="Several occurrences of the same value found"
             )
-        if any(tile not in list(range(n * n)) for tile in tiles):
+        if any(not 0 <= tile < n * n for tile in tiles):
             raise TilesFormatError(
                 tiles,
                 message=f"Tiles should only contain values between 0 and {n * n - 1}",
             )
         self.n = n
         self.tiles = tiles
+        self.blank = tiles.index(EMPTY_TILE)
+
+    @classmethod
+    def trusted(cls, n: int, tiles: list[int], blank: int | None = None) -> Npuzzle:
+        # skips the validation, only for states generated by the solvers
+        puzzle = cls.__new__(cls)
+        puzzle.n = n
+        puzzle.tiles = tiles
+        puzzle.blank = tiles.index(EMPTY_TILE) if blank is None else blank
+        return puzzle
+
+    @classmethod
+    def from_packed(cls, state: PackedState) -> Npuzzle:
+        return cls.trusted(state.n, state.tiles)
+
+    def pack(self) -> PackedState:
+        return PackedState.from_tiles(self.n, self.tiles)
 
     def __repr__(self) -> str:
         return f"Npuzzle({self.tiles}, n={self.n}, @{hex(id(self))})"
@@ -83,16 +130,14 @@ class Npuzzle:
 
     @property
     def empty_tile(self) -> int:
-        return self.tiles.index(EMPTY_TILE)
-
-    def is_solvable(self) -> bool:
-        inv = 0
-        goal = self.goal
-        for i in range(self.n * self.n - 1):
-            for j in range(i + 1, self.n * self.n):
-                if goal.tiles.index(self.tiles[i]) > goal.tiles.index(self.tiles[j]):
-                    inv += 1
-        goal_zero_coor = index_to_coor(goal.empty_tile, (self.n, self.n))
+        return self.blank
+
+    def is_solvable(self, goal: Npuzzle | None = None) -> bool:
+        if goal is None:
+            goal = self.goal
+        table = GoalTable.of(goal)
+        inv = count_inversions([table.position[tile] for tile in self.tiles])
+        goal_zero_coor = index_to_coor(table.position[EMPTY_TILE], (self.n, self.n))
         curr_zero_coor = index_to_coor(self.empty_tile, (self.n, self.n))
 
         d = abs(goal_zero_coor[0] - curr_zero_coor[0]) + abs(
@@ -136,7 +181,9 @@ class Npuzzle:
         return cls(n, tiles)
 
     @classmethod
-    def from_random(cls, n: int, solvable: bool = True) -> Npuzzle:
+    def from_random(
+        cls, n: int, solvable: bool = True, goal: Npuzzle | None = None
+    ) -> Npuzzle:
         def reverse_solvability(puzzle: Npuzzle) -> None:
             empty_tile = puzzle.empty_tile
             if empty_tile == 0 or empty_tile == 1:
@@ -148,87 +195,48 @@ class Npuzzle:
         random.shuffle(tiles)
         result = cls(n, tiles)
 
-        if result.is_solvable() ^ solvable:
+        if result.is_solvable(goal) ^ solvable:
             reverse_solvability(result)
 
         return result
 
     @property
     def goal(self) -> Npuzzle:
-        return Npuzzle(self.n, snail_array(self.n))
-
-    # note: I know this is not the right way to do things, for now it is what it is.
-    def make_move(self, move: Move) -> bool:
-        if move == Move.UP:
-            return self.__make_up()
-        elif move == Move.RIGHT:
-            return self.__make_right()
-        elif move == Move.DOWN:
-            return self.__make_down()
-        elif move == Move.LEFT:
-            return self.__make_left()
-        else:
-            return False
-
-    def __make_up(self) -> bool:
-        src = self.empty_tile
-        dst = src - self.n
-
-        if not index_in_list(dst, self.tiles):
-            return False
-
-        self.tiles[src] = self.tiles[dst]
-        self.tiles[dst] = EMPTY_TILE
-        return True
-
-    def __make_right(self) -> bool:
-        src_x, src_y = index_to_coor(self.empty_tile, (self.n, self.n))
-        dst_x = src_x + 1
-        dst_y = src_y
-
-        if not coor_in_list((dst_x, dst_y), (self.n, self.n)):
-            return False
-
-        dst = coor_to_index((dst_x, dst_y), (self.n, self.n))
-
-        self.tiles[self.empty_tile] = self.tiles[dst]
-        self.tiles[dst] = EMPTY_TILE
-
-        return True
-
-    def __make_down(self) -> bool:
-        src = self.empty_tile
-        dst = src + self.n
-
-        if not index_in_list(dst, self.tiles):
-            return False
-
-        self.tiles[src] = self.tiles[dst]
-        self.tiles[dst] = EMPTY_TILE
-        return True
-
-    def __make_left(self) -> bool:
-        src_x, src_y = index_to_coor(self.empty_tile, (self.n, self.n))
-        dst_x = src_x - 1
-        dst_y = src_y
-
-        if not coor_in_list((dst_x, dst_y), (self.n, self.n)):
-            return False
+        return Npuzzle.goal_for(self.n)
 
-        dst = coor_to_index((dst_x, dst_y), (self.n, self.n))
-
-        self.tiles[self.empty_tile] = self.tiles[dst]
-        self.tiles[dst] = EMPTY_TILE
+    @classmethod
+    def goal_for(cls, n: int, layout: Layout = Layout.SNAIL) -> Npuzzle:
+        return cls.trusted(n, goal_tiles(n, layout))
 
-        return True
+    def make_move(self, move: Move) -> bool:
+        for legal, dst in blank_moves(self.n)[self.blank]:
+            if legal == move:
+                self.slide(dst)
+                return True
+        return False
+
+    def undo_move(self, move: Move) -> bool:
+        return self.make_move(move.inverse)
+
+    def slide(self, dst: int) -> int:
+        # moves the tile at dst into the empty tile, returns the moved tile
+        tiles = self.tiles
+        tile = tiles[dst]
+        tiles[self.blank] = tile
+        tiles[dst] = EMPTY_TILE
+        self.blank = dst
+        return tile
+
+    def expand(self) -> list[tuple[Move, Npuzzle]]:
+        res: list[tuple[Move, Npuzzle]] = []
+        src = self.blank
+        for move, dst in blank_moves(self.n)[src]:
+            tiles = self.tiles.copy()
+            tiles[src] = tiles[dst]
+            tiles[dst] = EMPTY_TILE
+            res.append((move, Npuzzle.trusted(self.n, tiles, dst)))
+        return res
 
     @property
     def successors(self) -> list[Npuzzle]:
-        res: list[Npuzzle] = []
-        candidate = copy.deepcopy(self)
-        for move in Move:
-            success = candidate.make_move(move)
-            if success:
-                res.append(candidate)
-                candidate = copy.deepcopy(self)
-        return res
+        return [child for _, child in self.expand()]
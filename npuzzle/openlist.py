@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+from collections import deque
+from enum import Enum, auto
+from typing import Iterator, Protocol, Type, Union
+
+from npuzzle.node import Node
+from npuzzle.state import PackedState
+
+Priority = Union[int, float]
+
+
+class TieBreak(Enum):
+    FIFO = auto()
+    LIFO = auto()
+    HIGH_G = auto()
+    LOW_G = auto()
+
+
+class OpenList(Protocol):
+    # pushing a node whose state is already in the list replaces the stored one
+    def push(self, node: Node, priority: Priority) -> None:
+        ...
+
+    def pop(self) -> Node:
+        ...
+
+    # priority of the node pop would return
+    def top(self) -> Priority:
+        ...
+
+    def get(self, node: Node) -> Node | None:
+        ...
+
+    def __contains__(self, node: Node) -> bool:
+        ...
+
+    def __len__(self) -> int:
+        ...
+
+    # the nodes in the list, in no particular order
+    def __iter__(self) -> Iterator[Node]:
+        ...
+
+
+class HeapOpenList:
+    def __init__(self, tie_break: TieBreak = TieBreak.HIGH_G) -> None:
+        self.tie_break = tie_break
+        self.__heap: list[tuple[Priority, int, int, Node]] = []
+        self.__nodes: dict[PackedState, Node] = {}
+        self.__counter = itertools.count()
+
+    def push(self, node: Node, priority: Priority) -> None:
+        self.__nodes[node.key] = node
+        order = next(self.__counter)
+        if self.tie_break == TieBreak.FIFO:
+            entry = (priority, 0, order, node)
+        elif self.tie_break == TieBreak.LIFO:
+            entry = (priority, 0, -order, node)
+        elif self.tie_break == TieBreak.HIGH_G:
+            entry = (priority, -node.g, -order, node)
+        else:
+            entry = (priority, node.g, -order, node)
+        heapq.heappush(self.__heap, entry)
+
+    def __drop_replaced(self) -> None:
+        # entries of replaced nodes are dropped lazily
+        while self.__heap:
+            node = self.__heap[0][-1]
+            if self.__nodes.get(node.key) is node:
+                return
+            heapq.heappop(self.__heap)
+
+    def pop(self) -> Node:
+        self.__drop_replaced()
+        node = heapq.heappop(self.__heap)[-1]
+        del self.__nodes[node.key]
+        return node
+
+    def top(self) -> Priority:
+        self.__drop_replaced()
+        if not self.__heap:
+            raise IndexError("top of an empty open list")
+        return self.__heap[0][0]
+
+    def get(self, node: Node) -> Node | None:
+        return self.__nodes.get(node.key)
+
+    def __contains__(self, node: Node) -> bool:
+        return node.key in self.__nodes
+
+    def __len__(self) -> int:
+        return len(self.__nodes)
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self.__nodes.values())
+
+
+class BucketOpenList:
+    # priorities must be non-negative integers, which they are with COST = 1.
+    # The entries of a priority are indexed by g, and the g popped next is
+    # tracked: a push can only make it better, a pop only walks it past the
+    # g it emptied, so that neither scans the whole bucket
+    def __init__(self, tie_break: TieBreak = TieBreak.HIGH_G) -> None:
+        self.tie_break = tie_break
+        self.__buckets: list[list[deque[Node] | None]] = []
+        self.__sizes: list[int] = []
+        self.__next: list[int] = []
+        self.__min = 0
+        self.__nodes: dict[PackedState, Node] = {}
+
+    def push(self, node: Node, priority: Priority) -> None:
+        self.__nodes[node.key] = node
+        priority = int(priority)
+        while len(self.__buckets) <= priority:
+            self.__buckets.append([])
+            self.__sizes.append(0)
+            self.__next.append(0)
+        if priority < self.__min:
+            self.__min = priority
+
+        if self.tie_break in (TieBreak.HIGH_G, TieBreak.LOW_G):
+            rank = node.g
+        else:
+            rank = 0
+        bucket = self.__buckets[priority]
+        while len(bucket) <= rank:
+            bucket.append(None)
+        entries = bucket[rank]
+        if entries is None:
+            entries = bucket[rank] = deque()
+        entries.append(node)
+
+        following = self.__next[priority]
+        if (
+            not self.__sizes[priority]
+            or (self.tie_break == TieBreak.HIGH_G and rank > following)
+            or (self.tie_break == TieBreak.LOW_G and rank < following)
+        ):
+            self.__next[priority] = rank
+        self.__sizes[priority] += 1
+
+    def __next_entries(self) -> deque[Node]:
+        while not self.__sizes[self.__min]:
+            self.__min += 1
+        bucket = self.__buckets[self.__min]
+        rank = self.__next[self.__min]
+        step = -1 if self.tie_break == TieBreak.HIGH_G else 1
+        while not bucket[rank]:
+            rank += step
+        self.__next[self.__min] = rank
+        return bucket[rank]  # type: ignore
+
+    def __take(self, entries: deque[Node]) -> Node:
+        self.__sizes[self.__min] -= 1
+        if self.tie_break == TieBreak.FIFO:
+            return entries.popleft()
+        return entries.pop()
+
+    def __drop_replaced(self) -> None:
+        # entries of replaced nodes are dropped lazily
+        while self.__nodes:
+            entries = self.__next_entries()
+            node = entries[0 if self.tie_break == TieBreak.FIFO else -1]
+            if self.__nodes.get(node.key) is node:
+                return
+            self.__take(entries)
+
+    def pop(self) -> Node:
+        if not self.__nodes:
+            raise IndexError("pop from an empty open list")
+        self.__drop_replaced()
+        node = self.__take(self.__next_entries())
+        del self.__nodes[node.key]
+        return node
+
+    def top(self) -> Priority:
+        if not self.__nodes:
+            raise IndexError("top of an empty open list")
+        self.__drop_replaced()
+        return self.__min
+
+    def get(self, node: Node) -> Node | None:
+        return self.__nodes.get(node.key)
+
+    def __contains__(self, node: Node) -> bool:
+        return node.key in self.__nodes
+
+    def __len__(self) -> int:
+        return len(self.__nodes)
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self.__nodes.values())
+
+
+AVAILABLE_OPEN_LISTS: list[Type[OpenList]] = [
+    HeapOpenList,
+    BucketOpenList,
+]
+
+DEFAULT_OPEN_LIST: Type[OpenList] = HeapOpenList
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import math
+import mmap
+import os
+import struct
+from typing import Any, Callable, Sequence
+
+from npuzzle.goal import GoalTable, Layout, goal_tiles
+from npuzzle.npuzzle import EMPTY_TILE, Move, blank_moves
+from npuzzle.pdb import PDB_DIRECTORY, goal_name
+from npuzzle.utils import replacing
+
+# the only size whose states all fit in a table
+ORACLE_N = 3
+MAGIC = b"NORC"
+UNREACHABLE = 0xFF
+# an entry is the distance to the goal, followed by the move of the empty
+# tile that brings the state one step closer
+MOVE_BITS = 2
+MOVE_MASK = (1 << MOVE_BITS) - 1
+
+_HEADER = struct.Struct("<4sB")
+
+
+class OracleError(Exception):
+    """Exception raised when an oracle table can't be used."""
+
+    def __init__(self, path: str, message: str = "Invalid oracle table") -> None:
+        self.path = path
+        self.message = f"{message}. ({self.path} here)"
+        super().__init__(self.message)
+
+
+def rank(tiles: Sequence[int]) -> int:
+    # perfect hash: the position of the permutation among all of them, in
+    # lexicographic order
+    result = 0
+    remaining = list(range(len(tiles)))
+    for tile in tiles:
+        i = remaining.index(tile)
+        result = result * len(remaining) + i
+        del remaining[i]
+    return result
+
+
+def oracle_path(table: GoalTable, directory: str = PDB_DIRECTORY) -> str:
+    return os.path.join(directory, f"{table.n}x{table.n}_{goal_name(table)}.oracle")
+
+
+def build(
+    table: GoalTable, path: str, progress: Callable[[str], None] | None = None
+) -> None:
+    # BFS from the goal, every state is reached first by one of its optimal
+    # paths, whose last move is stored backwards
+    if table.n != ORACLE_N:
+        raise OracleError(path, message=f"Only the {ORACLE_N}x{ORACLE_N} states fit")
+    moves = blank_moves(table.n)
+    data = bytearray([UNREACHABLE]) * math.factorial(len(table.tiles))
+    total = len(data) // 2
+
+    start = bytes(table.tiles)
+    data[rank(start)] = 0
+    layer = [start]
+    depth = 0
+    seen = 1
+    while layer:
+        following: list[bytes] = []
+        for tiles in layer:
+            blank = tiles.index(EMPTY_TILE)
+            for move, cell in moves[blank]:
+                child = bytearray(tiles)
+                child[blank] = tiles[cell]
+                child[cell] = EMPTY_TILE
+                index = rank(child)
+                if data[index] == UNREACHABLE:
+                    data[index] = (depth + 1) << MOVE_BITS | move.inverse
+                    following.append(bytes(child))
+        seen += len(following)
+        if progress is not None:
+            progress(f"depth {depth}: {seen}/{total} states ({seen / total:.0%})")
+        layer = following
+        depth += 1
+
+    with replacing(path) as f:
+        f.write(_HEADER.pack(MAGIC, table.n))
+        f.write(bytes(table.tiles))
+        f.write(data)
+
+
+class OracleFile:
+    # memory-mapped, so that every process using the same file shares its pages
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.__open()
+
+    def __open(self) -> None:
+        with open(self.path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, n = _HEADER.unpack_from(self.data, 0)
+        except struct.error:
+            raise OracleError(self.path)
+        cells = n * n
+        if magic != MAGIC or len(self.data) != _HEADER.size + cells + math.factorial(
+            cells
+        ):
+            raise OracleError(self.path)
+
+        self.n: int = n
+        self.goal: tuple[int, ...] = tuple(
+            self.data[_HEADER.size : _HEADER.size + cells]
+        )
+        self.offset: int = _HEADER.size + cells
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.path = state["path"]
+        self.__open()
+
+    def lookup(self, tiles: Sequence[int]) -> int:
+        return self.data[self.offset + rank(tiles)]
+
+    def distance(self, tiles: Sequence[int]) -> int | None:
+        entry = self.lookup(tiles)
+        return None if entry == UNREACHABLE else entry >> MOVE_BITS
+
+    def move(self, tiles: Sequence[int]) -> Move | None:
+        # None at the goal and for the states that can't reach it
+        entry = self.lookup(tiles)
+        if entry == UNREACHABLE or entry >> MOVE_BITS == 0:
+            return None
+        return Move(entry & MOVE_MASK)
+
+
+# the tables mapped by this process, by path
+_files: dict[str, OracleFile] = {}
+
+
+def load(table: GoalTable, directory: str = PDB_DIRECTORY) -> OracleFile:
+    # only the tables of the goals of the layouts are served, which --goal
+    # chooses from: a goal of another shape, such as the start of the
+    # backward side of a bidirectional search, would need a table of its own
+    path = oracle_path(table, directory)
+    oracle = _files.get(path)
+    if oracle is None:
+        if table.n != ORACLE_N:
+            raise OracleError(
+                path, message=f"The oracle only knows the {ORACLE_N}x{ORACLE_N} states"
+            )
+        if all(tuple(goal_tiles(table.n, layout)) != table.tiles for layout in Layout):
+            raise OracleError(
+                path, message="The oracle only knows the goals of the layouts"
+            )
+        if not os.path.exists(path):
+            raise OracleError(
+                path, message="No oracle table, build it with --build-oracle"
+            )
+        oracle = OracleFile(path)
+        if oracle.goal != table.tiles:
+            raise OracleError(path, message="Unexpected goal")
+        _files[path] = oracle
+    return oracle
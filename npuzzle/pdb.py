@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import zlib
+from typing import Any, Callable, List, Tuple
+
+from npuzzle.goal import GoalTable, Layout, goal_tiles
+from npuzzle.npuzzle import EMPTY_TILE, blank_moves
+from npuzzle.utils import replacing
+
+PDB_DIRECTORY = "pdbs/"
+MAGIC = b"NPDB"
+UNKNOWN = 0xFF
+
+_HEADER = struct.Struct("<4sBB")
+_GROUP = struct.Struct("<BQ")
+
+Partition = List[Tuple[int, ...]]
+
+
+class PatternDatabaseError(Exception):
+    """Exception raised when a pattern database file can't be used."""
+
+    def __init__(self, path: str, message: str = "Invalid pattern database") -> None:
+        self.path = path
+        self.message = f"{message}. ({self.path} here)"
+        super().__init__(self.message)
+
+
+def default_partition(n: int) -> Partition:
+    # consecutive tiles are neighbours in both the snail and the row-major goals
+    size = {3: 4, 4: 5}.get(n, 3)
+    tiles = list(range(1, n * n))
+    return [tuple(tiles[i : i + size]) for i in range(0, len(tiles), size)]
+
+
+def parse_partition(value: str) -> Partition:
+    # "5-5-5" splits the tiles in consecutive groups, "1,2,3/4,5,6/..." lists them
+    if "/" in value or "," in value:
+        return [
+            tuple(int(tile) for tile in group.split(",")) for group in value.split("/")
+        ]
+    groups: Partition = []
+    first = 1
+    for size in value.split("-"):
+        groups.append(tuple(range(first, first + int(size))))
+        first += int(size)
+    return groups
+
+
+def index(positions: list[int], cells: int) -> int:
+    # perfect hash: the positions are the digits of a number in base cells
+    result = 0
+    for position in reversed(positions):
+        result = result * cells + position
+    return result
+
+
+def goal_name(table: GoalTable) -> str:
+    for layout in Layout:
+        if tuple(goal_tiles(table.n, layout)) == table.tiles:
+            return layout.value
+    return f"{zlib.crc32(bytes(table.tiles)):08x}"
+
+
+def database_path(
+    table: GoalTable, partition: Partition, directory: str = PDB_DIRECTORY
+) -> str:
+    sizes = "-".join(str(len(group)) for group in partition)
+    return os.path.join(
+        directory, f"{table.n}x{table.n}_{goal_name(table)}_{sizes}.pdb"
+    )
+
+
+def build_group(
+    table: GoalTable,
+    group: tuple[int, ...],
+    progress: Callable[[str], None] | None = None,
+) -> bytearray:
+    # retrograde 0-1 BFS over (positions of the group tiles, empty tile): only
+    # moves of the group tiles cost something, so the groups are additive
+    n = table.n
+    cells = n * n
+    k = len(group)
+    moves = blank_moves(n)
+    weights = [cells**i for i in range(k + 1)]
+    size = cells**k
+    total = 1
+    for i in range(k + 1):
+        total *= cells - i
+    dist = bytearray([UNKNOWN]) * (size * cells)
+
+    start = [table.position[tile] for tile in group] + [table.position[EMPTY_TILE]]
+    start_index = index(start, cells)
+    dist[start_index] = 0
+    layer = [start_index]
+    depth = 0
+    seen = 1
+
+    while layer:
+        following: list[int] = []
+        i = 0
+        while i < len(layer):
+            current = layer[i]
+            i += 1
+            if dist[current] != depth:
+                continue
+            blank, rest = divmod(current, size)
+            occupant = {}
+            for digit in range(k):
+                rest, position = divmod(rest, cells)
+                occupant[position] = weights[digit]
+            for _, cell in moves[blank]:
+                neighbour = current + (cell - blank) * size
+                weight = occupant.get(cell)
+                if weight is None:
+                    known = dist[neighbour]
+                    if known == UNKNOWN or known > depth:
+                        seen += known == UNKNOWN
+                        dist[neighbour] = depth
+                        layer.append(neighbour)
+                else:
+                    neighbour += (blank - cell) * weight
+                    if dist[neighbour] == UNKNOWN:
+                        seen += 1
+                        dist[neighbour] = depth + 1
+                        following.append(neighbour)
+        if progress is not None:
+            progress(
+                f"group {group}: depth {depth}, {seen}/{total} states ({seen / total:.0%})"
+            )
+        layer = following
+        depth += 1
+
+    # the empty tile is the most significant digit, it is projected away
+    result = dist[:size]
+    for blank in range(1, cells):
+        result = bytearray(map(min, result, dist[blank * size : (blank + 1) * size]))
+    return result
+
+
+def build(
+    table: GoalTable,
+    partition: Partition,
+    path: str,
+    progress: Callable[[str], None] | None = None,
+) -> None:
+    tables = [build_group(table, group, progress) for group in partition]
+
+    header_size = _HEADER.size + len(table.tiles)
+    header_size += sum(_GROUP.size + len(group) for group in partition)
+
+    with replacing(path) as f:
+        f.write(_HEADER.pack(MAGIC, table.n, len(partition)))
+        f.write(bytes(table.tiles))
+        offset = header_size
+        for group, group_table in zip(partition, tables):
+            f.write(_GROUP.pack(len(group), offset))
+            f.write(bytes(group))
+            offset += len(group_table)
+        for group_table in tables:
+            f.write(group_table)
+
+
+class PatternDatabaseFile:
+    # memory-mapped, so that every process using the same file shares its pages
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.__open()
+
+    def __open(self) -> None:
+        with open(self.path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, n, count = _HEADER.unpack_from(self.data, 0)
+        except struct.error:
+            raise PatternDatabaseError(self.path)
+        if magic != MAGIC:
+            raise PatternDatabaseError(self.path)
+
+        self.n: int = n
+        self.cells: int = n * n
+        offset = _HEADER.size
+        self.goal: tuple[int, ...] = tuple(self.data[offset : offset + self.cells])
+        offset += self.cells
+
+        self.groups: list[tuple[int, ...]] = []
+        self.offsets: list[int] = []
+        self.group_of: list[int] = [-1] * self.cells
+        # what a move of the tile adds to the index of its group, per cell
+        self.weight: list[int] = [0] * self.cells
+        for i in range(count):
+            k, group_offset = _GROUP.unpack_from(self.data, offset)
+            offset += _GROUP.size
+            group = tuple(self.data[offset : offset + k])
+            offset += k
+            self.groups.append(group)
+            self.offsets.append(group_offset)
+            for k, tile in enumerate(group):
+                self.group_of[tile] = i
+                self.weight[tile] = self.cells**k
+
+        # the tables follow the header, one after the other
+        for group, group_offset in zip(self.groups, self.offsets):
+            if group_offset != offset:
+                raise PatternDatabaseError(self.path)
+            offset += self.cells ** len(group)
+        if offset != len(self.data):
+            raise PatternDatabaseError(self.path, message="Truncated pattern database")
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.path = state["path"]
+        self.__open()
+
+    def index(self, positions: list[int]) -> int:
+        return index(positions, self.cells)
+
+    def entry(self, group: int, i: int) -> int:
+        return self.data[self.offsets[group] + i]
+
+    def lookup(self, group: int, positions: list[int]) -> int:
+        return self.entry(group, self.index(positions))
+
+    def evaluate(self, tiles: list[int]) -> int:
+        where = [0] * self.cells
+        for i, tile in enumerate(tiles):
+            where[tile] = i
+        return sum(
+            self.lookup(i, [where[tile] for tile in group])
+            for i, group in enumerate(self.groups)
+        )
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import cProfile
+import os
+import pstats
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+PROFILE_FILE = "npuzzle.prof"
+PROFILE_TOP = 20
+
+# modules whose calls are attributed to a phase, when made by these
+SOLVER_MODULES = ("solver.py", "hda.py")
+
+# (module, function) called by the solvers, "*" for any function of the module
+PHASES: dict[str, list[tuple[str, str]]] = {
+    "expansion": [
+        ("node.py", "expand"),
+        ("node.py", "successors"),
+        ("node.py", "state"),
+        ("node.py", "__init__"),
+        ("npuzzle.py", "*"),
+    ],
+    "heuristic": [("distance.py", "*")],
+    "open list": [("openlist.py", "*"), ("queue.py", "*")],
+    "goal test": [("state.py", "__eq__")],
+}
+
+
+def phase_of(function: tuple[str, int, str]) -> str | None:
+    filename, _, name = function
+    module = os.path.basename(filename)
+    for phase, functions in PHASES.items():
+        for phase_module, phase_name in functions:
+            if module == phase_module and phase_name in ("*", name):
+                return phase
+    return None
+
+
+def phase_timers(stats: pstats.Stats) -> dict[str, float]:
+    # the cumulative time of the calls from the solvers into each phase, what
+    # the phase calls in turn is part of it
+    timers = {phase: 0.0 for phase in PHASES}
+    for function, (_, _, _, _, callers) in stats.stats.items():  # type: ignore
+        phase = phase_of(function)
+        if phase is None:
+            continue
+        for caller, (_, _, _, cumulative) in callers.items():
+            if os.path.basename(caller[0]) in SOLVER_MODULES:
+                timers[phase] += cumulative
+    return timers
+
+
+def profile(
+    path: str | None,
+    func: Callable[..., T],
+    *args: Any,
+    top: int = PROFILE_TOP,
+    **kwargs: Any,
+) -> T:
+    # without a path, func is simply called
+    if path is None:
+        return func(*args, **kwargs)
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+        stats = pstats.Stats(profiler)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+        total = stats.total_tt  # type: ignore
+        print("Phases:")
+        for phase, seconds in phase_timers(stats).items():
+            share = seconds / total if total else 0.0
+            print(f"        {phase}: {seconds:.3f}s ({share:.0%})")
+        print(f"The profile has been saved in {path}.")
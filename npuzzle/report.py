@@ -1,17 +1,47 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
+import tracemalloc
+from dataclasses import dataclass, field
+from enum import Enum
 from functools import wraps
-from typing import Any, Callable, Protocol, TypeVar
+from typing import Any, Callable, NamedTuple, Protocol, TypeVar
+
+from npuzzle.budget import Limit
 
 T = TypeVar("T")
 
+# marks the wrappers of ReportManager that can be stripped from an instance,
+# and names the subclass of a class without them
+_COUNTER = "_report_counter"
+_STRIPPED = "_report_stripped"
+
+
+class Instrumentation(Enum):
+    # off: nothing is counted, counters: the solvers count in local variables
+    # and flush them at the end of run, full: every operation goes through the
+    # wrappers of ReportManager and run measures the peak of allocated memory
+    OFF = "off"
+    COUNTERS = "counters"
+    FULL = "full"
+
+
+DEFAULT_INSTRUMENTATION = Instrumentation.COUNTERS
+
 
 class Reportable(Protocol):
     report: Report
 
 
+class Stage(NamedTuple):
+    # a solution of an anytime solver, at most suboptimality times the optimal
+    weight: float
+    length: int
+    suboptimality: float
+    time_complexity: int
+    time_taken_in_s: float
+
+
 @dataclass
 class Report:
     author: str
@@ -21,15 +51,52 @@ class Report:
     start: int | None = None
     end: int | None = None
     result: Any | None = None
+    instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION
+    peak_memory: int | None = None
+    budget_hit: Limit | None = None
+    best_h: int | None = None
+    bound: float | None = None
+    stages: list[Stage] = field(default_factory=list)
+    cache_hits: int = 0
+    cache_misses: int = 0
 
     def __str__(self) -> str:
+        extra = ""
+        if self.instrumentation is Instrumentation.FULL:
+            extra = f"""
+        Nodes per second: {self.nodes_per_second:.0f},
+        Effective branching factor: {self.branching_factor},
+        Peak memory: {self.peak_memory} bytes,"""
+        for stage in self.stages:
+            extra += f"""
+        Stage with w={stage.weight:g}: {stage.length} moves, at most {stage.suboptimality:.3f} times the optimal, after {stage.time_complexity} nodes and {stage.time_taken_in_s:.2f}s,"""
+        if self.cache_hits or self.cache_misses:
+            extra += f"""
+        Cache: {self.cache_hits} hits, {self.cache_misses} misses,"""
+        if self.budget_hit is not None:
+            extra += f"""
+        Budget hit: {self.budget_hit.value} (best h {self.best_h}, bound {self.bound}),"""
         return f"""Report(
         Result: {self.result}
         Complexity in time: {self.time_complexity},
-        Complexity in size: {self.size_complexity},
+        Complexity in size: {self.size_complexity},{extra}
         In {self.time_taken_in_s:.2f}s,
         By {self.author},\n)"""
 
+    def out_of_budget(
+        self, limit: Limit, best_h: int | None = None, bound: float | None = None
+    ) -> None:
+        # what the run knew when it stopped
+        self.budget_hit = limit
+        self.best_h = best_h
+        self.bound = bound
+
+    def flush(self, time_complexity: int, size_complexity: int) -> None:
+        # the local counters of a solver, when the wrappers have been stripped
+        if self.instrumentation is Instrumentation.COUNTERS:
+            self.time_complexity += time_complexity
+            self.size_complexity = max(self.size_complexity, size_complexity)
+
     @staticmethod
     def current_time() -> int:
         return time.perf_counter_ns()
@@ -47,19 +114,97 @@ class Report:
         else:
             return self.end - self.start  # type: ignore
 
+    @property
+    def suboptimality(self) -> float | None:
+        return self.stages[-1].suboptimality if self.stages else None
+
+    @property
+    def nodes_per_second(self) -> float:
+        seconds = self.time_taken_in_s
+        return self.time_complexity / seconds if seconds > 0 else float("+inf")
+
+    @property
+    def branching_factor(self) -> float | None:
+        # b such that a uniform tree as deep as the solution has as many nodes:
+        # time_complexity + 1 = 1 + b + b^2 + ... + b^depth
+        depth = self.result
+        if not isinstance(depth, int) or depth <= 0 or self.time_complexity <= 0:
+            return None
+        nodes = self.time_complexity + 1
+        low, high = 0.0, float(nodes)
+        for _ in range(64):
+            b = (low + high) / 2
+            if sum(b**i for i in range(depth + 1)) < nodes:
+                low = b
+            else:
+                high = b
+        return round(high, 3)
+
 
 class ReportManager:
     @staticmethod
     def time(func: Callable[..., T]) -> Callable[..., T]:
         @wraps(func)
         def wrapper(instance: Reportable, *args: Any, **kwargs: Any) -> T:
-            instance.report.start = Report.current_time()
-            result = func(instance, *args, **kwargs)
-            instance.report.end = Report.current_time()
+            # an outer trace isn't touched, its peak can't be reset before 3.9
+            trace = (
+                instance.report.instrumentation is Instrumentation.FULL
+                and not tracemalloc.is_tracing()
+            )
+            if trace:
+                tracemalloc.start()
+            try:
+                instance.report.start = Report.current_time()
+                result = func(instance, *args, **kwargs)
+                instance.report.end = Report.current_time()
+                if trace:
+                    instance.report.peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                if trace:
+                    tracemalloc.stop()
             return result
 
         return wrapper
 
+    @staticmethod
+    def instrument(instance: Reportable, level: Instrumentation) -> None:
+        instance.report.instrumentation = level
+        if level is not Instrumentation.FULL:
+            ReportManager.strip(instance)
+
+    @staticmethod
+    def stripped(cls: type) -> type:
+        # the subclass of cls whose methods are those of cls without the
+        # counting wrappers, made once and kept as an attribute of cls so that
+        # pickle finds it by its name
+        known = vars(cls).get(_STRIPPED)
+        if known is not None:
+            return known
+
+        names: set[str] = set()
+        methods: dict[str, Any] = {}
+        for base in cls.__mro__:
+            for name, attr in vars(base).items():
+                if name in names:
+                    continue
+                names.add(name)
+                if getattr(attr, _COUNTER, False):
+                    while getattr(attr, _COUNTER, False):
+                        attr = attr.__wrapped__
+                    methods[name] = attr
+        methods["__module__"] = cls.__module__
+        methods["__qualname__"] = f"{cls.__qualname__}.{_STRIPPED}"
+        subclass = type(cls.__name__, (cls,), methods)
+        setattr(subclass, _STRIPPED, subclass)
+        setattr(cls, _STRIPPED, subclass)
+        return subclass
+
+    @staticmethod
+    def strip(instance: Reportable) -> None:
+        # the instance becomes one of the stripped subclass of its class, the
+        # class and its other instances keep the wrappers
+        instance.__class__ = ReportManager.stripped(type(instance))
+
     @staticmethod
     def count(func: Callable[..., T]) -> Callable[..., T]:
         @wraps(func)
@@ -68,6 +213,7 @@ class ReportManager:
             instance.report.time_complexity += 1
             return result
 
+        setattr(wrapper, _COUNTER, True)
         return wrapper
 
     @staticmethod
@@ -86,6 +232,7 @@ class ReportManager:
                     )
                 return result
 
+            setattr(wrapper, _COUNTER, True)
             return wrapper
 
         return decorator
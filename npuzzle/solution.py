@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import sys
+from typing import IO, Iterator
+
+from npuzzle.node import Node
+from npuzzle.npuzzle import MOVE_LETTERS, Move, Npuzzle
+
+
+class Solution:
+    # a path as the moves of the empty tile from start, one letter each
+    def __init__(self, start: Npuzzle, moves: str) -> None:
+        self.start = start
+        self.moves = moves
+
+    @classmethod
+    def from_node(cls, node: Node) -> Solution:
+        letters: list[str] = []
+        while node.parent is not None:
+            assert node.move is not None
+            letters.append(node.move.letter)
+            node = node.parent
+        letters.reverse()
+        return cls(node.state, "".join(letters))
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def __str__(self) -> str:
+        return self.moves
+
+    def __iter__(self) -> Iterator[Move]:
+        for letter in self.moves:
+            yield Move(MOVE_LETTERS.index(letter))
+
+    def states(self, ascending: bool = False) -> Iterator[Npuzzle]:
+        # a single board walks the path, copy it to keep a state around
+        board = Npuzzle.trusted(self.start.n, self.start.tiles.copy(), self.start.blank)
+        if not ascending:
+            yield board
+            for move in self:
+                board.make_move(move)
+                yield board
+        else:
+            for move in self:
+                board.make_move(move)
+            yield board
+            for move in reversed(list(self)):
+                board.undo_move(move)
+                yield board
+
+    def display(self, ascending: bool = False, file: IO[str] = sys.stdout) -> None:
+        for state in self.states(ascending):
+            file.write(f"{state}\n\n")
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from npuzzle.goal import GoalTable
+from npuzzle.npuzzle import EMPTY_TILE, Npuzzle
+
+
+def solvable_mask(boards: Any, goal: Npuzzle) -> np.ndarray:
+    # boards is anything shaped (count, n * n) or (count, n, n)
+    table = GoalTable.of(goal)
+    n = table.n
+    boards = np.asarray(boards).reshape(-1, n * n)
+    order = np.asarray(table.position)[boards]
+
+    inversions = np.zeros(len(boards), dtype=np.int64)
+    for i in range(n * n - 1):
+        inversions += (order[:, i, None] > order[:, i + 1 :]).sum(axis=1)
+
+    blank = np.argmax(boards == EMPTY_TILE, axis=1)
+    goal_blank = table.position[EMPTY_TILE]
+    d = np.abs(blank // n - goal_blank // n) + np.abs(blank % n - goal_blank % n)
+
+    return d % 2 == inversions % 2
+
+
+def random_boards(
+    n: int,
+    count: int,
+    solvable: bool = True,
+    goal: Npuzzle | None = None,
+    rng: np.random.Generator | None = None,
+) -> np.ndarray:
+    if goal is None:
+        goal = Npuzzle.goal_for(n)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    boards = rng.permuted(np.tile(np.arange(n * n), (count, 1)), axis=1)
+
+    # same trick as Npuzzle.from_random: swapping two tiles flips the solvability
+    rows = np.nonzero(solvable_mask(boards, goal) != solvable)[0]
+    blank_in_front = (boards[rows, 0] == EMPTY_TILE) | (boards[rows, 1] == EMPTY_TILE)
+    a = np.where(blank_in_front, n * n - 2, 0)
+    b = a + 1
+    swapped = boards[rows, a].copy()
+    boards[rows, a] = boards[rows, b]
+    boards[rows, b] = swapped
+
+    return boards
+
+
+def random_puzzles(
+    n: int,
+    count: int,
+    solvable: bool = True,
+    goal: Npuzzle | None = None,
+    rng: np.random.Generator | None = None,
+) -> list[Npuzzle]:
+    boards = random_boards(n, count, solvable=solvable, goal=goal, rng=rng)
+    return [Npuzzle.trusted(n, board) for board in boards.tolist()]
@@ -1,105 +1,228 @@
 from __future__ import annotations
 
+import heapq
 import inspect
-from queue import LifoQueue, PriorityQueue, Queue
-from typing import Protocol, Type
-
-from npuzzle.distance import Distance
+import itertools
+import multiprocessing
+import os
+import time
+from queue import LifoQueue, Queue
+from typing import Any, Callable, Protocol, Type, cast
+
+from npuzzle.budget import Budget, Limit, rss
+from npuzzle.cache import SolutionCache
+from npuzzle.distance import (
+    GOAL_TABLE_HEURISTICS,
+    INADMISSIBLE_HEURISTICS,
+    Distance,
+    ExactDistance,
+    IncrementalDistance,
+    PatternDatabase,
+    is_incremental,
+    successor_distance,
+)
+from npuzzle.goal import GoalTable
+from npuzzle.hda import (
+    NODES,
+    PARENT,
+    POLL_INTERVAL,
+    STOP,
+    WorkerError,
+    owner,
+    run_worker,
+    terminated,
+)
 from npuzzle.node import COST, Node
-from npuzzle.npuzzle import Npuzzle
-from npuzzle.report import Report, ReportManager
+from npuzzle.npuzzle import Move, Npuzzle, blank_moves
+from npuzzle.openlist import DEFAULT_OPEN_LIST, OpenList, TieBreak
+from npuzzle.oracle import ORACLE_N, OracleFile, load, oracle_path
+from npuzzle.pdb import PDB_DIRECTORY, database_path, default_partition
+from npuzzle.report import (
+    DEFAULT_INSTRUMENTATION,
+    Instrumentation,
+    Report,
+    ReportManager,
+    Stage,
+)
+from npuzzle.solution import Solution
+from npuzzle.state import Key, PackedState
+
+# how often a parallel search checks whether another worker has succeeded
+STOP_CHECK_INTERVAL = 4096
+# subtrees handed out per worker and per iteration, for load balancing
+TASKS_PER_JOB = 8
+# first weight of the heuristic of ARAStar, lowered by at least the step
+# after each solution
+DEFAULT_WEIGHT = 3.0
+WEIGHT_STEP = 0.5
+# nodes SMAStar keeps in memory by default
+DEFAULT_MAX_NODES = 1 << 16
+# the lazy heaps of SMAStar are rebuilt once they are this many times larger
+# than the nodes in memory
+COMPACTION_FACTOR = 2
+# bytes a node of a 4x4 board costs SMAStar on a 64-bit CPython, to turn a
+# size into nodes: the node and its packed board, its f and its slots in nodes
+# and f, its slot in the children of its parent, and an entry in each of the
+# live dicts and up to COMPACTION_FACTOR in each heap, as the heaps keep their
+# stale entries until they are rebuilt. Measured at about 980, rounded up
+NODE_SIZE = 1024
+
+
+class HeuristicError(Exception):
+    """Exception raised when a solver can't use a heuristic."""
+
+    def __init__(
+        self, name: str, message: str = "This heuristic can't be used here"
+    ) -> None:
+        self.name = name
+        self.message = f"{message}. ({self.name} here)"
+        super().__init__(self.message)
 
 
 class Solver(Protocol):
     report: Report
 
-    def run(self, start: Npuzzle, goal: Npuzzle) -> Node | None:
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
         ...
 
 
 class AStar:
-    def __init__(self, distance: Distance) -> None:
-        self.open: PriorityQueue[Node] = PriorityQueue()
-        self.__open_hash: set[Node] = set()
+    def __init__(
+        self,
+        distance: Distance,
+        open_list: OpenList | None = None,
+        instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION,
+    ) -> None:
+        self.open: OpenList = DEFAULT_OPEN_LIST() if open_list is None else open_list
         self.close: set[Node] = set()
         self.distance: Distance = distance
         self.report: Report = Report(
             author=f"AStar with {type(self.distance).__name__}"
         )
+        ReportManager.instrument(self, instrumentation)
 
     @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
     @ReportManager.time
-    def run(self, start: Npuzzle, goal: Npuzzle) -> Node | None:
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        if budget is not None:
+            budget.start()
+        goal = GoalTable.pin(goal)
         root = Node(start)
+        root.h = self.distance.compute(start, goal)
+        goal_key = GoalTable.of(goal).key
         self.__add_to_open(root)
 
-        while not self.open.empty():
+        # what the wrappers count, for the counters instrumentation
+        expanded = 0
+        peak = 0
+        counting = self.report.instrumentation is Instrumentation.COUNTERS
+        best_h = root.h
+        while self.open:
+            if counting:
+                size = len(self.open) + len(self.close)
+                if size > peak:
+                    peak = size
+            if budget is not None:
+                limit = budget.check(expanded, len(self.open))
+                if limit is not None:
+                    self.report.flush(expanded, peak)
+                    self.report.out_of_budget(limit, best_h=best_h)
+                    return None
             current = self.__remove_from_open()
+            expanded += 1
+            if current.h < best_h:
+                best_h = current.h
 
-            if current.state == goal:
+            if current.key == goal_key:
+                self.report.flush(expanded, peak)
                 return current
 
             self.__add_to_close(current)
-            successors = current.successors
-            for successor in successors:
+            state = current.state
+            for successor, successor_state in current.expand(state):
                 if self.__node_in_close(successor):
                     continue
                 g = current.g + COST
-                if self.__node_in_open(successor):
-                    if g < successor.g:
-                        successor.g = g
-                        successor.parent = current.parent
-                else:
+                known = self.open.get(successor)
+                if known is None:
                     successor.g = g
-                    successor.h = self.distance.compute(successor.state, goal)
-                    successor.parent = current
+                    successor.h = successor_distance(
+                        self.distance, current.h, state, successor_state, goal
+                    )
                     self.__add_to_open(successor)
+                elif g < known.g:
+                    successor.g = g
+                    successor.h = known.h
+                    self.__update_open(successor)
+        self.report.flush(expanded, peak)
         return None
 
-    @ReportManager.balance(2)
+    @ReportManager.balance(1)
     def __add_to_open(self, node: Node) -> None:
-        self.open.put(node)
-        self.__open_hash.add(node)
+        self.open.push(node, node.f)
+
+    def __update_open(self, node: Node) -> None:
+        self.open.push(node, node.f)
 
     @ReportManager.balance(1)
     def __add_to_close(self, node: Node) -> None:
         self.close.add(node)
 
-    @ReportManager.balance(-2)
+    @ReportManager.balance(-1)
     @ReportManager.count
     def __remove_from_open(self) -> Node:
-        result = self.open.get()
-        self.__open_hash.remove(result)
-        return result
-
-    @ReportManager.balance(-1)
-    def __remove_from_close(self, node: Node) -> None:
-        self.close.remove(node)
+        return self.open.pop()
 
     def __node_in_close(self, node: Node) -> bool:
         return node in self.close
 
-    def __node_in_open(self, node: Node) -> bool:
-        return node in self.__open_hash
-
 
 class Dijkstra:
-    def __init__(self) -> None:
-        self.open: PriorityQueue[Node] = PriorityQueue()
-        self.__open_hash: set[Node] = set()
+    def __init__(
+        self,
+        open_list: OpenList | None = None,
+        instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION,
+    ) -> None:
+        self.open: OpenList = DEFAULT_OPEN_LIST() if open_list is None else open_list
         self.close: set[Node] = set()
         self.report: Report = Report(author="Dijkstra")
+        ReportManager.instrument(self, instrumentation)
 
     @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
     @ReportManager.time
-    def run(self, start: Npuzzle, goal: Npuzzle) -> Node | None:
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        if budget is not None:
+            budget.start()
         root = Node(start)
+        goal_key = GoalTable.of(goal).key
         self.__add_to_open(root)
 
-        while not self.open.empty():
+        # what the wrappers count, for the counters instrumentation
+        expanded = 0
+        peak = 0
+        counting = self.report.instrumentation is Instrumentation.COUNTERS
+        while self.open:
+            if counting:
+                size = len(self.open) + len(self.close)
+                if size > peak:
+                    peak = size
+            if budget is not None:
+                limit = budget.check(expanded, len(self.open))
+                if limit is not None:
+                    self.report.flush(expanded, peak)
+                    self.report.out_of_budget(limit)
+                    return None
             current = self.__remove_from_open()
+            expanded += 1
 
-            if current.state == goal:
+            if current.key == goal_key:
+                self.report.flush(expanded, peak)
                 return current
 
             self.__add_to_close(current)
@@ -108,73 +231,106 @@ class Dijkstra:
                 if self.__node_in_close(successor):
                     continue
                 g = current.g + COST
-                if self.__node_in_open(successor):
-                    if g < successor.g:
-                        successor.g = g
-                else:
+                known = self.open.get(successor)
+                if known is None:
                     successor.g = g
-                    successor.parent = current
                     self.__add_to_open(successor)
+                elif g < known.g:
+                    successor.g = g
+                    self.__update_open(successor)
+        self.report.flush(expanded, peak)
         return None
 
-    @ReportManager.balance(2)
+    @ReportManager.balance(1)
     def __add_to_open(self, node: Node) -> None:
-        self.open.put(node)
-        self.__open_hash.add(node)
+        self.open.push(node, node.g)
+
+    def __update_open(self, node: Node) -> None:
+        self.open.push(node, node.g)
 
     @ReportManager.balance(1)
     def __add_to_close(self, node: Node) -> None:
         self.close.add(node)
 
-    @ReportManager.balance(-2)
+    @ReportManager.balance(-1)
     @ReportManager.count
     def __remove_from_open(self) -> Node:
-        result = self.open.get()
-        self.__open_hash.remove(result)
-        return result
+        return self.open.pop()
 
     def __node_in_close(self, node: Node) -> bool:
         return node in self.close
 
-    def __node_in_open(self, node: Node) -> bool:
-        return node in self.__open_hash
-
 
 class GreedySearch:
-    def __init__(self, distance: Distance) -> None:
-        self.open: PriorityQueue[Node] = PriorityQueue()
+    def __init__(
+        self,
+        distance: Distance,
+        open_list: OpenList | None = None,
+        instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION,
+    ) -> None:
+        self.open: OpenList = DEFAULT_OPEN_LIST() if open_list is None else open_list
         self.close: set[Node] = set()
         self.distance: Distance = distance
         self.report: Report = Report(
             author=f"GreedySearch with {type(self.distance).__name__}"
         )
+        ReportManager.instrument(self, instrumentation)
 
     @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
     @ReportManager.time
-    def run(self, start: Npuzzle, goal: Npuzzle) -> Node | None:
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        if budget is not None:
+            budget.start()
+        goal = GoalTable.pin(goal)
         root = Node(start)
+        root.h = self.distance.compute(start, goal)
+        goal_key = GoalTable.of(goal).key
         self.__add_to_open(root)
 
-        while not self.open.empty():
+        # what the wrappers count, for the counters instrumentation
+        expanded = 0
+        peak = 0
+        counting = self.report.instrumentation is Instrumentation.COUNTERS
+        best_h = root.h
+        while self.open:
+            if counting:
+                size = len(self.open) + len(self.close)
+                if size > peak:
+                    peak = size
+            if budget is not None:
+                limit = budget.check(expanded, len(self.open))
+                if limit is not None:
+                    self.report.flush(expanded, peak)
+                    self.report.out_of_budget(limit, best_h=best_h)
+                    return None
             current = self.__remove_from_open()
+            expanded += 1
+            if current.h < best_h:
+                best_h = current.h
 
-            if current.state == goal:
+            if current.key == goal_key:
+                self.report.flush(expanded, peak)
                 return current
 
             self.__add_to_close(current)
-            successors = current.successors
-            for successor in successors:
-                if self.__node_in_close(successor):
+            state = current.state
+            for successor, successor_state in current.expand(state):
+                if self.__node_in_close(successor) or successor in self.open:
                     continue
                 else:
-                    successor.h = self.distance.compute(successor.state, goal)
-                    successor.parent = current
+                    successor.g = current.g + COST
+                    successor.h = successor_distance(
+                        self.distance, current.h, state, successor_state, goal
+                    )
                     self.__add_to_open(successor)
+        self.report.flush(expanded, peak)
         return None
 
     @ReportManager.balance(1)
     def __add_to_open(self, node: Node) -> None:
-        self.open.put(node)
+        self.open.push(node, node.h)
 
     @ReportManager.balance(1)
     def __add_to_close(self, node: Node) -> None:
@@ -183,39 +339,62 @@ class GreedySearch:
     @ReportManager.balance(-1)
     @ReportManager.count
     def __remove_from_open(self) -> Node:
-        result = self.open.get()
-        return result
+        return self.open.pop()
 
     def __node_in_close(self, node: Node) -> bool:
         return node in self.close
 
 
 class BFS:
-    def __init__(self) -> None:
+    def __init__(
+        self, instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION
+    ) -> None:
         self.queue: Queue[Node] = Queue()
         self.visited: set[Node] = set()
         self.report: Report = Report(author="BFS")
+        ReportManager.instrument(self, instrumentation)
 
     @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
     @ReportManager.time
-    def run(self, start: Npuzzle, goal: Npuzzle) -> Node | None:
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        if budget is not None:
+            budget.start()
         root = Node(start)
+        goal_key = GoalTable.of(goal).key
         self.__add_to_visited(root)
         self.__add_to_queue(root)
 
+        expanded = 0
+        peak = 0
+        counting = self.report.instrumentation is Instrumentation.COUNTERS
         while not self.queue.empty():
+            if counting:
+                size = self.queue.qsize() + len(self.visited)
+                if size > peak:
+                    peak = size
+            if budget is not None:
+                limit = budget.check(expanded, self.queue.qsize())
+                if limit is not None:
+                    self.report.flush(expanded, peak)
+                    self.report.out_of_budget(limit)
+                    return None
             current = self.__remove_from_queue()
+            expanded += 1
 
-            if current.state == goal:
+            if current.key == goal_key:
+                self.report.flush(expanded, peak)
                 return current
 
             successors = current.successors
 
             for successor in successors:
                 if not successor in self.visited:
-                    successor.parent = current
                     self.__add_to_visited(successor)
                     self.__add_to_queue(successor)
+        self.report.flush(expanded, peak)
+        return None
 
     @ReportManager.balance(1)
     def __add_to_queue(self, node: Node) -> None:
@@ -232,21 +411,44 @@ class BFS:
 
 
 class DFS:
-    def __init__(self) -> None:
+    def __init__(
+        self, instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION
+    ) -> None:
         self.stack: LifoQueue[Node] = LifoQueue()
         self.visited: set[Node] = set()
         self.report: Report = Report(author="DFS")
+        ReportManager.instrument(self, instrumentation)
 
     @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
     @ReportManager.time
-    def run(self, start: Npuzzle, goal: Npuzzle) -> Node | None:
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        if budget is not None:
+            budget.start()
         root = Node(start)
+        goal_key = GoalTable.of(goal).key
         self.__add_to_stack(root)
 
+        expanded = 0
+        peak = 0
+        counting = self.report.instrumentation is Instrumentation.COUNTERS
         while not self.stack.empty():
+            if counting:
+                size = self.stack.qsize() + len(self.visited)
+                if size > peak:
+                    peak = size
+            if budget is not None:
+                limit = budget.check(expanded, self.stack.qsize())
+                if limit is not None:
+                    self.report.flush(expanded, peak)
+                    self.report.out_of_budget(limit)
+                    return None
             current = self.__remove_from_stack()
+            expanded += 1
 
-            if current.state == goal:
+            if current.key == goal_key:
+                self.report.flush(expanded, peak)
                 return current
 
             if not current in self.visited:
@@ -254,8 +456,9 @@ class DFS:
 
                 successors = current.successors
                 for successor in successors:
-                    successor.parent = current
                     self.__add_to_stack(successor)
+        self.report.flush(expanded, peak)
+        return None
 
     @ReportManager.balance(1)
     def __add_to_stack(self, node: Node) -> None:
@@ -272,78 +475,1070 @@ class DFS:
 
 
 class IDAStar:
-    def __init__(self, distance: Distance) -> None:
-        self.path: LifoQueue[Node] = LifoQueue()
+    # depth-first on a single board: moves are applied and undone in place and
+    # the path is an explicit stack, so nothing is allocated per node
+    def __init__(
+        self,
+        distance: Distance,
+        instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION,
+    ) -> None:
         self.distance: Distance = distance
+        self.moves: list[Move] = []
+        # nodes expanded by the previous iterations of the run
+        self.expanded = 0
         self.report: Report = Report(
             author=f"IDAStar with {type(self.distance).__name__}"
         )
+        ReportManager.instrument(self, instrumentation)
+
+    def search(
+        self,
+        board: Npuzzle,
+        goal: Npuzzle,
+        h: int,
+        bound: float,
+        g: int = 0,
+        stop: Callable[[], bool] | None = None,
+        budget: Budget | None = None,
+    ) -> float | None:
+        # searches below board, reached from the start in g moves (the last
+        # ones are at the end of self.moves). None when the goal is reached,
+        # the smallest f above bound otherwise or when stop() tells to give up
+        # or the budget is exhausted
+        table = blank_moves(board.n)
+        update: Callable[..., int] | None = None
+        if is_incremental(self.distance):
+            update = cast(IncrementalDistance, self.distance).update
+
+        # for each depth: the cell of the empty tile, h and the next move to try
+        path: list[int] = []
+        self.__add_to_path(path, board.blank)
+        hs = [h]
+        tried = [0]
+        minimum = float("+inf")
+        countdown = STOP_CHECK_INTERVAL
+        expanded = 0
+        peak = len(path)
+        counting = self.report.instrumentation is Instrumentation.COUNTERS
+
+        while tried:
+            src = path[-1]
+            options = table[src]
+            i = tried[-1]
+            if i == len(options):
+                tried.pop()
+                hs.pop()
+                self.__remove_from_path(path)
+                if path:
+                    board.slide(path[-1])
+                    self.moves.pop()
+                continue
+            tried[-1] = i + 1
+
+            move, dst = options[i]
+            if self.moves and move == self.moves[-1].inverse:
+                continue
+            tile = self.__slide(board, dst)
+            expanded += 1
+            if stop is not None:
+                countdown -= 1
+                if not countdown:
+                    countdown = STOP_CHECK_INTERVAL
+                    if stop():
+                        break
+            if budget is not None:
+                limit = budget.check(self.expanded + expanded, len(path))
+                if limit is not None:
+                    self.report.out_of_budget(limit, bound=bound)
+                    break
+            if update is None:
+                h = self.distance.compute(board, goal)
+            else:
+                h = update(hs[-1], tile, dst, src, board, goal)
+
+            f = g + (len(path) - 1) + COST + h
+            if f > bound:
+                if f < minimum:
+                    minimum = f
+                board.slide(src)
+                continue
+
+            self.moves.append(move)
+            if h == 0 and board.tiles == goal.tiles:
+                self.report.flush(expanded, peak)
+                self.expanded += expanded
+                return None
+            self.__add_to_path(path, dst)
+            if counting and len(path) > peak:
+                peak = len(path)
+            hs.append(h)
+            tried.append(0)
+
+        self.report.flush(expanded, peak)
+        self.expanded += expanded
+        return minimum
+
+    @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
+    @ReportManager.time
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        if budget is not None:
+            budget.start()
+        goal = GoalTable.pin(goal)
+        board = Npuzzle.trusted(start.n, start.tiles.copy(), start.blank)
+        h = self.distance.compute(board, goal)
+        self.moves = []
+        self.expanded = 0
+        if h == 0 and board.tiles == goal.tiles:
+            return Node(start)
+
+        bound: float | None = h
+        while bound is not None:
+            if bound == float("+inf"):
+                return None
+            bound = self.search(board, goal, h, bound, budget=budget)
+            if self.report.budget_hit is not None:
+                return None
+        return Node.from_moves(start, self.moves)
 
     @ReportManager.count
-    def __search(self, goal: Npuzzle, g: int, bound: int) -> Node | int | None:
-        node = self.path.queue[-1]
-        node.g = g
-        node.h = self.distance.compute(node.state, goal)
-
-        if node.f > bound:
-            return node.f
-        if node.state == goal:
-            return node
-
-        min_ = float("+inf")
-        successors = node.successors
-        for successor in successors:
-            if not self.__node_in_path(successor):
-                successor.parent = node
-                self.__add_to_path(successor)
-
-                t = self.__search(goal, node.g + COST, bound)
-                if isinstance(t, Node):
-                    return t
-                if isinstance(t, (int, float)) and t < min_:
-                    min_ = t
-                self.__remove_from_path()
-        if min_ == float("+inf"):
-            return None
-        else:
-            return min_  # type: ignore
+    def __slide(self, board: Npuzzle, dst: int) -> int:
+        return board.slide(dst)
+
+    @ReportManager.balance(1)
+    def __add_to_path(self, path: list[int], cell: int) -> None:
+        path.append(cell)
+
+    @ReportManager.balance(-1)
+    def __remove_from_path(self, path: list[int]) -> int:
+        return path.pop()
+
+
+# state of a ParallelIDAStar worker process, set once by the pool initializer
+_worker: tuple[
+    Distance, Npuzzle, Any, Instrumentation, float | None, int | None
+] | None = None
+
+
+def _init_worker(
+    distance: Distance,
+    goal: Npuzzle,
+    stop: Any,
+    instrumentation: Instrumentation,
+    deadline: float | None,
+    frontier: int | None,
+) -> None:
+    global _worker
+    _worker = (distance, goal, stop, instrumentation, deadline, frontier)
+
+
+def _search_subtree(
+    task: tuple[list[int], int, list[Move], int, int]
+) -> tuple[list[Move] | None, float, int, int, int, Limit | None]:
+    assert _worker is not None
+    distance, goal, stop, instrumentation, deadline, frontier = _worker
+    tiles, blank, moves, h, bound = task
+
+    # the deadline of the budget is checked by every worker
+    def stopped() -> bool:
+        return stop.is_set() or (deadline is not None and time.monotonic() >= deadline)
+
+    if stopped():
+        return None, float("+inf"), 0, 0, 0, None
+
+    # the frontier of IDA* is its path, which starts above the subtree
+    budget = None if frontier is None else Budget(frontier=frontier - len(moves))
+    solver = IDAStar(distance, instrumentation)
+    solver.moves = moves
+    board = Npuzzle.trusted(goal.n, tiles, blank)
+    t = solver.search(board, goal, h, bound, g=len(moves), stop=stopped, budget=budget)
+    return (
+        solver.moves if t is None else None,
+        float("+inf") if t is None else t,
+        solver.report.time_complexity,
+        solver.report.size_complexity,
+        solver.expanded,
+        solver.report.budget_hit,
+    )
+
+
+class ParallelIDAStar:
+    # IDA* whose iterations are shared by a pool of processes: the tree is
+    # split at a shallow depth, and every subtree below is an independent
+    # task. The bound is the same for all of them, so the first solution
+    # found during an iteration is optimal and stops the other workers.
+    def __init__(
+        self,
+        distance: Distance,
+        jobs: int | None = None,
+        instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION,
+    ) -> None:
+        self.distance: Distance = distance
+        self.jobs: int = jobs if jobs is not None else os.cpu_count() or 1
+        self.moves: list[Move] = []
+        self.report: Report = Report(
+            author=f"ParallelIDAStar with {type(self.distance).__name__}"
+        )
+        ReportManager.instrument(self, instrumentation)
+
+    def __split(
+        self, start: Npuzzle, goal: Npuzzle, h: int, bound: float
+    ) -> tuple[list[tuple[list[int], int, list[Move], int, int]], float]:
+        # expands whole layers until there are enough subtrees to keep every
+        # worker busy, returns them with the smallest f cut on the way
+        layer: list[tuple[Npuzzle, list[Move], int]] = [(start, [], h)]
+        minimum = float("+inf")
+        depth = 0
+        generated = 0
+        while layer and len(layer) < self.jobs * TASKS_PER_JOB:
+            following: list[tuple[Npuzzle, list[Move], int]] = []
+            depth += COST
+            for state, moves, state_h in layer:
+                for move, child in state.expand():
+                    if moves and move == moves[-1].inverse:
+                        continue
+                    child_h = self.__generate(state_h, state, child, goal)
+                    generated += 1
+                    f = depth + child_h
+                    if f > bound:
+                        minimum = min(minimum, f)
+                    elif child_h == 0 and child.tiles == goal.tiles:
+                        self.moves = moves + [move]
+                        self.report.flush(generated, 0)
+                        return [], minimum
+                    else:
+                        following.append((child, moves + [move], child_h))
+            layer = following
+        self.report.flush(generated, 0)
+        tasks = [
+            (state.tiles, state.blank, moves, state_h, int(bound))
+            for state, moves, state_h in layer
+        ]
+        return tasks, minimum
+
+    @ReportManager.count
+    def __generate(
+        self, state_h: int, state: Npuzzle, child: Npuzzle, goal: Npuzzle
+    ) -> int:
+        return successor_distance(self.distance, state_h, state, child, goal)
 
     @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
     @ReportManager.time
-    def run(self, start: Npuzzle, goal: Npuzzle) -> Node | None:
-        root = Node(start)
-        bound = self.distance.compute(root.state, goal)
-        self.__add_to_path(root)
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        if budget is not None:
+            budget.start()
+        goal = GoalTable.pin(goal)
+        h = self.distance.compute(start, goal)
+        self.moves = []
+        if h == 0 and start.tiles == goal.tiles:
+            return Node(start)
+
+        stop = multiprocessing.Event()
+        with multiprocessing.Pool(
+            self.jobs,
+            initializer=_init_worker,
+            initargs=(
+                self.distance,
+                goal,
+                stop,
+                self.report.instrumentation,
+                None if budget is None else budget.deadline,
+                None if budget is None else budget.frontier,
+            ),
+        ) as pool:
+            # the expanded nodes of the workers are summed as their tasks end
+            expanded = 0
+            bound = float(h)
+            while bound != float("+inf"):
+                tasks, minimum = self.__split(start, goal, h, bound)
+                if self.moves:
+                    return Node.from_moves(start, self.moves)
+
+                # one task at a time, so that idle workers steal the next one
+                results = pool.imap_unordered(_search_subtree, tasks, chunksize=1)
+                limit = None
+                for (
+                    moves,
+                    t,
+                    time_complexity,
+                    size_complexity,
+                    task_expanded,
+                    task_limit,
+                ) in results:
+                    self.report.time_complexity += time_complexity
+                    self.report.size_complexity = max(
+                        self.report.size_complexity, size_complexity
+                    )
+                    expanded += task_expanded
+                    if moves is not None and not self.moves:
+                        self.moves = moves
+                        stop.set()
+                    elif budget is not None and limit is None:
+                        limit = task_limit or budget.exceeded(expanded)
+                        if limit is not None:
+                            stop.set()
+                    minimum = min(minimum, t)
+                if self.moves:
+                    return Node.from_moves(start, self.moves)
+                if limit is not None:
+                    self.report.out_of_budget(limit, bound=bound)
+                    return None
+                bound = minimum
+        return None
+
+
+class HDAStar:
+    # hash distributed A*: every worker process owns the states hashed to it,
+    # with their open list and closed set, and the states it generates are
+    # sent in batches to their owners. The cost of the best solution found so
+    # far is shared, and the search ends once no worker has a node below it.
+    def __init__(
+        self,
+        distance: Distance,
+        jobs: int | None = None,
+        instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION,
+    ) -> None:
+        self.distance: Distance = distance
+        self.jobs: int = jobs if jobs is not None else os.cpu_count() or 1
+        self.report: Report = Report(
+            author=f"HDAStar with {type(self.distance).__name__}"
+        )
+        ReportManager.instrument(self, instrumentation)
 
+    def __path(self, goal: Npuzzle, inboxes: list[Any], results: Any) -> Node:
+        # every owner knows the parent of its states
+        keys: list[Key] = [goal.pack().key]
         while True:
-            t = self.__search(goal, 0, bound)
-            if isinstance(t, Node) or t is None:
-                return t
-            else:
-                bound = t
+            inboxes[owner(keys[-1], self.jobs)].put((PARENT, keys[-1]))
+            _, _, parent = results.get()
+            if parent is None:
+                break
+            keys.append(parent)
+
+        keys.reverse()
+        return Node.from_keys([PackedState(goal.n, key) for key in keys])
+
+    @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
+    @ReportManager.time
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        if budget is not None:
+            budget.start()
+        goal = GoalTable.pin(goal)
+        inboxes = [multiprocessing.Queue() for _ in range(self.jobs)]
+        results: Any = multiprocessing.Queue()
+        shared = {
+            "sent": multiprocessing.Array("q", self.jobs, lock=False),
+            "received": multiprocessing.Array("q", self.jobs, lock=False),
+            "idle": multiprocessing.Array("b", self.jobs, lock=False),
+            "incumbent": multiprocessing.Value("d", float("+inf"), lock=False),
+            "expanded": multiprocessing.Array("q", self.jobs, lock=False),
+            "frontier": multiprocessing.Array("q", self.jobs, lock=False),
+        }
+
+        root = start.pack().key
+        h = self.distance.compute(start, goal)
+        inboxes[owner(root, self.jobs)].put((NODES, [(root, 0, h, None)]))
+        workers = [
+            multiprocessing.Process(
+                target=run_worker,
+                args=(
+                    i,
+                    self.distance,
+                    goal,
+                    inboxes,
+                    results,
+                    shared,
+                    self.report.instrumentation,
+                ),
+                daemon=True,
+            )
+            for i in range(self.jobs)
+        ]
+        for worker in workers:
+            worker.start()
+
+        # the root batch is the only one not sent by a worker. The workers
+        # publish their expanded nodes and the size of their open list after
+        # each round, the budget is checked against the sums
+        limit = None
+        while not terminated(shared, 1):
+            for worker in workers:
+                if worker.exitcode is not None:
+                    for other in workers:
+                        other.terminate()
+                    raise WorkerError(worker.exitcode)
+            if budget is not None:
+                limit = budget.exceeded(
+                    sum(shared["expanded"]),
+                    sum(shared["frontier"]),
+                    memory=sum(rss(worker.pid) for worker in workers),
+                )
+                if limit is not None:
+                    break
+            time.sleep(POLL_INTERVAL)
+
+        result = None
+        if limit is not None:
+            self.report.out_of_budget(limit)
+        elif shared["incumbent"].value != float("+inf"):
+            result = self.__path(goal, inboxes, results)
+
+        for inbox in inboxes:
+            inbox.put((STOP, None))
+        for _ in workers:
+            _, time_complexity, size_complexity = results.get()
+            self.report.time_complexity += time_complexity
+            self.report.size_complexity += size_complexity
+        for worker in workers:
+            # a stopped search may leave batches nobody reads, which would
+            # keep the worker from exiting
+            if limit is not None:
+                worker.terminate()
+            worker.join()
+        if limit is not None:
+            for inbox in inboxes:
+                inbox.cancel_join_thread()
+        return result
+
+
+class BidirectionalSearch:
+    # MM: a search from each end, the forward one toward the goal and the
+    # backward one toward the start, both ordered by max(f, 2g) so that
+    # they meet in the middle. The best path found through a state seen by
+    # both sides is optimal once it costs no more than the smallest priority.
+    def __init__(
+        self,
+        distance: Distance,
+        instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION,
+    ) -> None:
+        # the backward search estimates the distance to the start
+        if type(distance) in GOAL_TABLE_HEURISTICS:
+            raise HeuristicError(
+                type(distance).__name__,
+                message="BidirectionalSearch can't use a table of the goal",
+            )
+        self.open: tuple[OpenList, OpenList] = (
+            DEFAULT_OPEN_LIST(),
+            DEFAULT_OPEN_LIST(),
+        )
+        self.close: tuple[dict[PackedState, Node], dict[PackedState, Node]] = ({}, {})
+        self.distance: Distance = distance
+        self.report: Report = Report(
+            author=f"BidirectionalSearch with {type(self.distance).__name__}"
+        )
+        ReportManager.instrument(self, instrumentation)
+
+    @staticmethod
+    def __priority(node: Node) -> int:
+        return max(node.f, 2 * node.g)
+
+    def __known(self, side: int, node: Node) -> Node | None:
+        known = self.open[side].get(node)
+        if known is None:
+            known = self.close[side].get(node.key)
+        return known
+
+    @staticmethod
+    def __join(forward: Node, backward: Node) -> Node:
+        # the backward half is walked back from the meeting state to the goal
+        node = forward
+        while backward.parent is not None:
+            assert backward.move is not None
+            child = Node(backward.parent.key, node, backward.move.inverse)
+            child.g = node.g + COST
+            node = child
+            backward = backward.parent
+        return node
+
+    @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
+    @ReportManager.time
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        if budget is not None:
+            budget.start()
+        start, goal = GoalTable.pin(start), GoalTable.pin(goal)
+        ends = (start, goal)
+        roots = (Node(start), Node(goal))
+        for side, root in enumerate(roots):
+            root.h = self.distance.compute(ends[side], ends[1 - side])
+            self.__add_to_open(side, root)
+
+        best = float("+inf")
+        meeting: tuple[Node, Node] | None = None
+        if start.pack() == goal.pack():
+            best = 0
+            meeting = (Node(start), Node(goal))
+
+        expanded = 0
+        peak = 0
+        counting = self.report.instrumentation is Instrumentation.COUNTERS
+        # how close to the goal the forward side got
+        best_h = roots[0].h
+        while self.open[0] and self.open[1]:
+            if counting:
+                size = sum(map(len, self.open)) + sum(map(len, self.close))
+                if size > peak:
+                    peak = size
+            if budget is not None:
+                limit = budget.check(expanded, sum(map(len, self.open)))
+                if limit is not None:
+                    self.report.flush(expanded, peak)
+                    self.report.out_of_budget(limit, best_h=best_h)
+                    return None
+            tops = (self.open[0].top(), self.open[1].top())
+            if best <= min(tops):
+                break
+            side = 0 if tops[0] <= tops[1] else 1
+
+            current = self.__remove_from_open(side)
+            expanded += 1
+            if side == 0 and current.h < best_h:
+                best_h = current.h
+            self.__add_to_close(side, current)
+            state = current.state
+            for successor, successor_state in current.expand(state):
+                g = current.g + COST
+                known = self.__known(side, successor)
+                if known is None:
+                    successor.h = successor_distance(
+                        self.distance,
+                        current.h,
+                        state,
+                        successor_state,
+                        ends[1 - side],
+                    )
+                elif known.g <= g:
+                    continue
+                else:
+                    successor.h = known.h
+                    if successor.key in self.close[side]:
+                        self.__remove_from_close(side, successor)
+                successor.g = g
+                if known is None or successor not in self.open[side]:
+                    self.__add_to_open(side, successor)
+                else:
+                    self.__update_open(side, successor)
+
+                other = self.__known(1 - side, successor)
+                if other is not None and g + other.g < best:
+                    best = g + other.g
+                    meeting = (successor, other) if side == 0 else (other, successor)
+
+        self.report.flush(expanded, peak)
+        if meeting is None:
+            return None
+        return self.__join(*meeting)
 
     @ReportManager.balance(1)
-    def __add_to_path(self, node: Node) -> None:
-        self.path.put(node)
+    def __add_to_open(self, side: int, node: Node) -> None:
+        self.open[side].push(node, self.__priority(node))
+
+    def __update_open(self, side: int, node: Node) -> None:
+        self.open[side].push(node, self.__priority(node))
+
+    @ReportManager.balance(1)
+    def __add_to_close(self, side: int, node: Node) -> None:
+        self.close[side][node.key] = node
 
     @ReportManager.balance(-1)
-    def __remove_from_path(self) -> Node:
-        return self.path.get()
+    @ReportManager.count
+    def __remove_from_open(self, side: int) -> Node:
+        return self.open[side].pop()
+
+    @ReportManager.balance(-1)
+    def __remove_from_close(self, side: int, node: Node) -> None:
+        del self.close[side][node.key]
+
+
+class ARAStar:
+    # anytime repairing A*: weighted A*, whose weight is lowered after each
+    # solution. A node improved once expanded isn't reopened during a stage,
+    # it waits in incons until the next one, which starts from the open list
+    # of the previous stage instead of from scratch. Every stage proves the
+    # best solution is at most suboptimality times the optimal, and a budget
+    # running out returns the best solution found so far.
+    def __init__(
+        self,
+        distance: Distance,
+        weight: float = DEFAULT_WEIGHT,
+        anytime: bool = True,
+        instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION,
+    ) -> None:
+        self.open: OpenList = DEFAULT_OPEN_LIST()
+        self.close: set[PackedState] = set()
+        self.incons: dict[PackedState, Node] = {}
+        # the best node known for each state seen
+        self.nodes: dict[PackedState, Node] = {}
+        self.distance: Distance = distance
+        self.weight = weight
+        self.anytime = anytime
+        self.report: Report = Report(
+            author=f"ARAStar with {type(self.distance).__name__}"
+        )
+        ReportManager.instrument(self, instrumentation)
 
-    def __node_in_path(self, node: Node) -> bool:
-        return any(n.state == node.state for n in self.path.queue)
+    def __suboptimality(self, best: Node, weight: float) -> float:
+        # every state with a lower g than it could have is in open or incons
+        lower = min(
+            (node.g + node.h for node in (*self.open, *self.incons.values())),
+            default=best.g,
+        )
+        return min(weight, best.g / lower) if lower > 0 else 1.0
 
+    def __next_stage(self, weight: float) -> None:
+        nodes = [*self.open, *self.incons.values()]
+        self.open = DEFAULT_OPEN_LIST()
+        self.incons.clear()
+        self.close.clear()
+        for node in nodes:
+            self.__add_to_open(node, weight)
 
-# TODO
-class BidirectionalSearch:
-    def __init__(self, distance: Distance) -> None:
+    @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
+    @ReportManager.time
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        if budget is not None:
+            budget.start()
+        goal = GoalTable.pin(goal)
+        root = Node(start)
+        root.h = self.distance.compute(start, goal)
+        goal_key = GoalTable.of(goal).key
+        self.__add_node(root)
+        if root.key == goal_key:
+            return root
+
+        weight = max(1.0, self.weight)
+        self.__add_to_open(root, weight)
+        best: Node | None = None
+        expanded = 0
+        best_h = root.h
+        while True:
+            # the goal isn't pushed, it is enough to know its best g
+            while self.open and (best is None or best.g > self.open.top()):
+                if budget is not None:
+                    limit = budget.check(expanded, len(self.open))
+                    if limit is not None:
+                        self.report.flush(expanded, len(self.nodes))
+                        self.report.out_of_budget(limit, best_h=best_h)
+                        return best
+                current = self.__remove_from_open()
+                expanded += 1
+                if current.h < best_h:
+                    best_h = current.h
+
+                self.__add_to_close(current)
+                state = current.state
+                for successor, successor_state in current.expand(state):
+                    g = current.g + COST
+                    known = self.nodes.get(successor.key)
+                    if known is not None and known.g <= g:
+                        continue
+                    successor.g = g
+                    if known is None:
+                        successor.h = successor_distance(
+                            self.distance, current.h, state, successor_state, goal
+                        )
+                        self.__add_node(successor)
+                    else:
+                        successor.h = known.h
+                        self.nodes[successor.key] = successor
+
+                    if successor.key == goal_key:
+                        best = successor
+                    elif successor.key in self.close:
+                        self.incons[successor.key] = successor
+                    else:
+                        self.__add_to_open(successor, weight)
+
+            if best is None:
+                self.report.flush(expanded, len(self.nodes))
+                return None
+            suboptimality = self.__suboptimality(best, weight)
+            self.report.stages.append(
+                Stage(
+                    weight,
+                    best.g,
+                    suboptimality,
+                    expanded,
+                    self.report.time_taken_in_s,
+                )
+            )
+            if not self.anytime or weight == 1.0 or suboptimality <= 1.0:
+                self.report.flush(expanded, len(self.nodes))
+                return best
+            weight = max(1.0, min(weight - WEIGHT_STEP, suboptimality))
+            self.__next_stage(weight)
+
+    @ReportManager.balance(1)
+    def __add_node(self, node: Node) -> None:
+        self.nodes[node.key] = node
+
+    def __add_to_open(self, node: Node, weight: float) -> None:
+        self.open.push(node, node.g + weight * node.h)
+
+    def __add_to_close(self, node: Node) -> None:
+        self.close.add(node.key)
+
+    @ReportManager.count
+    def __remove_from_open(self) -> Node:
+        return self.open.pop()
+
+
+class SMAStar:
+    # simplified memory-bounded A*: at most max_nodes nodes are kept, one per
+    # state. When memory is full, the leaf with the highest f (the shallowest
+    # among ties) is forgotten and its parent remembers its f, to generate it
+    # again once that is the lowest f of open. f never decreases along a path
+    # and is backed up from the children to their parent, so the first goal
+    # out of open is optimal, provided a whole solution fits in max_nodes.
+    # Otherwise the f of the paths that don't fit becomes infinite and run
+    # ends up returning None
+    def __init__(
+        self,
+        distance: Distance,
+        max_nodes: int | None = None,
+        max_bytes: int | None = None,
+        instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION,
+    ) -> None:
+        limits = [limit for limit in (max_nodes, max_bytes) if limit is not None]
+        if max_bytes is not None:
+            limits[-1] = max_bytes // NODE_SIZE
+        self.max_nodes = max(2, min(limits)) if limits else DEFAULT_MAX_NODES
+        self.nodes: dict[PackedState, Node] = {}
+        # backed up f of the nodes in memory
+        self.f: dict[PackedState, float] = {}
+        # children in memory of the expanded nodes
+        self.children: dict[PackedState, set[PackedState]] = {}
+        # f of the forgotten children, of the nodes that have some
+        self.forgotten: dict[PackedState, dict[PackedState, float]] = {}
+        # lazy heaps, only the last entry pushed for a state is live, the
+        # others are skipped
+        self.open: list[tuple[float, int, int, Node]] = []
+        self.leaves: list[tuple[float, int, int, Node]] = []
+        self.__live_open: dict[PackedState, tuple[float, int]] = {}
+        self.__live_leaves: dict[PackedState, tuple[float, int]] = {}
+        self.__order = itertools.count()
         self.distance: Distance = distance
         self.report: Report = Report(
-            author=f"BidirectionalSearch with {type(self.distance).__name__}"
+            author=f"SMAStar with {type(self.distance).__name__}"
+        )
+        ReportManager.instrument(self, instrumentation)
+
+    def __priority(self, key: PackedState) -> float:
+        # the lowest f expanding the node would reveal
+        if key in self.children:
+            return min(self.forgotten.get(key, {}).values(), default=float("+inf"))
+        return self.f[key]
+
+    def __is_valid(self, node: Node) -> bool:
+        return self.nodes.get(node.key) is node
+
+    def __is_leaf(self, key: PackedState) -> bool:
+        return not self.children.get(key)
+
+    def __push_open(self, node: Node) -> None:
+        priority = self.__priority(node.key)
+        live = self.__live_open.get(node.key)
+        if live is not None and live[0] == priority:
+            return
+        if priority == float("+inf"):
+            self.__live_open.pop(node.key, None)
+            return
+        # the deepest first among ties
+        order = next(self.__order)
+        self.__live_open[node.key] = (priority, order)
+        heapq.heappush(self.open, (priority, -node.g, order, node))
+        if len(self.open) > COMPACTION_FACTOR * len(self.nodes):
+            self.open = [entry for entry in self.open if self.__is_open(entry)]
+            heapq.heapify(self.open)
+
+    def __is_open(self, entry: tuple[float, int, int, Node]) -> bool:
+        node = entry[-1]
+        return self.__is_valid(node) and self.__live_open.get(node.key) == (
+            entry[0],
+            entry[2],
         )
 
-    def run(self, start: Npuzzle, goal: Npuzzle) -> Node | None:
-        raise NotImplementedError
+    def __push_leaf(self, node: Node) -> None:
+        f = self.f[node.key]
+        live = self.__live_leaves.get(node.key)
+        if live is not None and live[0] == f:
+            return
+        # the highest f first, the shallowest among ties
+        order = next(self.__order)
+        self.__live_leaves[node.key] = (f, order)
+        heapq.heappush(self.leaves, (-f, node.g, order, node))
+        if len(self.leaves) > COMPACTION_FACTOR * len(self.nodes):
+            self.leaves = [entry for entry in self.leaves if self.__is_live(entry)]
+            heapq.heapify(self.leaves)
+
+    def __is_live(self, entry: tuple[float, int, int, Node]) -> bool:
+        node = entry[-1]
+        return self.__is_valid(node) and self.__live_leaves.get(node.key) == (
+            -entry[0],
+            entry[2],
+        )
+
+    def __worst_leaf(self, keep: Node) -> Node | None:
+        # neither keep nor the root, which has nowhere to back up its f. The
+        # leaf stays in the heap until it is forgotten
+        kept = []
+        worst = None
+        while self.leaves:
+            entry = heapq.heappop(self.leaves)
+            node = entry[-1]
+            if not self.__is_live(entry):
+                continue
+            if not self.__is_leaf(node.key):
+                # pushed again once it is a leaf again
+                del self.__live_leaves[node.key]
+                continue
+            if node is keep or node.parent is None:
+                kept.append(entry)
+                continue
+            worst = node
+            kept.append(entry)
+            break
+        for entry in kept:
+            heapq.heappush(self.leaves, entry)
+        return worst
+
+    def __back_up(self, node: Node | None, expanding: Node | None = None) -> None:
+        # the f of a node is the lowest of its children, remembered or not.
+        # The node being expanded is backed up once all its children are in
+        while node is not None and node is not expanding and node.key in self.children:
+            key = node.key
+            f = min(
+                (
+                    *(self.f[child] for child in self.children[key]),
+                    *self.forgotten.get(key, {}).values(),
+                ),
+                default=float("+inf"),
+            )
+            f = max(self.f[key], f)
+            if f == self.f[key]:
+                return
+            self.f[key] = f
+            if self.__is_leaf(key):
+                self.__push_leaf(node)
+            node = node.parent
+
+    def __forget(self, node: Node, expanding: Node) -> None:
+        # a leaf, whose f its parent remembers
+        assert node.parent is not None
+        parent = node.parent.key
+        f = self.f[node.key]
+        self.__remove_node(node)
+        self.forgotten.setdefault(parent, {})[node.key] = f
+        self.__push_open(node.parent)
+        if self.__is_leaf(parent):
+            self.__push_leaf(node.parent)
+        # a child that can't lead anywhere in memory has an infinite f
+        self.__back_up(node.parent, expanding)
+
+    def __drop(self, node: Node, expanding: Node) -> None:
+        # a node reached by a longer path than another one, with its subtree
+        subtree = [node]
+        i = 0
+        while i < len(subtree):
+            subtree.extend(
+                self.nodes[child] for child in self.children.get(subtree[i].key, ())
+            )
+            i += 1
+        for descendant in reversed(subtree):
+            self.__remove_node(descendant)
+        assert node.parent is not None
+        if self.__is_leaf(node.parent.key):
+            self.__push_leaf(node.parent)
+        self.__back_up(node.parent, expanding)
+
+    @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
+    @ReportManager.time
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        if budget is not None:
+            budget.start()
+        goal = GoalTable.pin(goal)
+        root = Node(start)
+        root.h = self.distance.compute(start, goal)
+        goal_key = GoalTable.of(goal).key
+        self.__add_node(root, root.h)
+
+        expanded = 0
+        peak = 0
+        counting = self.report.instrumentation is Instrumentation.COUNTERS
+        best_h = root.h
+        while self.open:
+            if counting and len(self.nodes) > peak:
+                peak = len(self.nodes)
+            if budget is not None:
+                limit = budget.check(expanded, len(self.open))
+                if limit is not None:
+                    self.report.flush(expanded, peak)
+                    self.report.out_of_budget(limit, best_h=best_h, bound=self.__top())
+                    return None
+            current = self.__remove_from_open()
+            if current is None:
+                break
+            expanded += 1
+            if current.h < best_h:
+                best_h = current.h
+
+            if current.key == goal_key:
+                self.report.flush(expanded, peak)
+                return current
+
+            # once expanded, only the forgotten children that may lead to the
+            # goal are generated again, with the f they had. Their records
+            # stay until they are back in memory
+            expanded_before = current.key in self.children
+            children = self.children.setdefault(current.key, set())
+            forgotten = self.forgotten.setdefault(current.key, {})
+            state = current.state
+            successors: list[tuple[float, Node]] = []
+            for successor, successor_state in current.expand(state):
+                if successor.key in children:
+                    continue
+                f = forgotten.get(successor.key)
+                if expanded_before and (f is None or f == float("+inf")):
+                    continue
+                g = current.g + COST
+                known = self.nodes.get(successor.key)
+                if known is not None and known.g <= g:
+                    forgotten.pop(successor.key, None)
+                    continue
+                if known is not None:
+                    self.__drop(known, current)
+                successor.g = g
+                successor.h = successor_distance(
+                    self.distance, current.h, state, successor_state, goal
+                )
+                f = max(self.f[current.key], f or 0, g + successor.h)
+                successors.append((f, successor))
+
+            # the best first, a child worse than every leaf is forgotten
+            # right away rather than in place of one
+            successors.sort(key=lambda successor: successor[0])
+            for f, successor in successors:
+                if len(self.nodes) >= self.max_nodes:
+                    worst = self.__worst_leaf(current)
+                    if worst is None:
+                        # the path to current already fills the memory
+                        forgotten[successor.key] = float("+inf")
+                        continue
+                    if (f, -successor.g) >= (self.f[worst.key], -worst.g):
+                        forgotten[successor.key] = f
+                        continue
+                    self.__forget(worst, current)
+                self.__add_node(successor, f)
+                children.add(successor.key)
+                forgotten.pop(successor.key, None)
+            if not forgotten:
+                del self.forgotten[current.key]
+            # the children forgotten to make room for their siblings
+            self.__push_open(current)
+            self.__back_up(current)
+        self.report.flush(expanded, peak)
+        return None
+
+    @ReportManager.balance(1)
+    def __add_node(self, node: Node, f: float) -> None:
+        self.nodes[node.key] = node
+        self.f[node.key] = f
+        self.__push_open(node)
+        self.__push_leaf(node)
+
+    @ReportManager.balance(-1)
+    def __remove_node(self, node: Node) -> None:
+        key = node.key
+        del self.nodes[key]
+        del self.f[key]
+        self.children.pop(key, None)
+        self.forgotten.pop(key, None)
+        self.__live_open.pop(key, None)
+        self.__live_leaves.pop(key, None)
+        if node.parent is not None:
+            self.children[node.parent.key].discard(key)
+
+    def __top(self) -> float:
+        # the lowest f of open, a lower bound of the length of a solution
+        while self.open:
+            if self.__is_open(self.open[0]):
+                return self.open[0][0]
+            heapq.heappop(self.open)
+        return float("+inf")
+
+    @ReportManager.count
+    def __remove_from_open(self) -> Node | None:
+        if self.__top() == float("+inf"):
+            return None
+        node = heapq.heappop(self.open)[-1]
+        del self.__live_open[node.key]
+        return node
+
+
+class Oracle:
+    # no search: every step follows the optimal move stored for the state in
+    # the table of the 3x3 puzzle, built by a BFS from the goal once for all
+    def __init__(
+        self,
+        directory: str = PDB_DIRECTORY,
+        instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION,
+    ) -> None:
+        self.directory = directory
+        self.path: list[Node] = []
+        self.report: Report = Report(author="Oracle")
+        ReportManager.instrument(self, instrumentation)
+
+    @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
+    @ReportManager.time
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        if budget is not None:
+            budget.start()
+        oracle = load(GoalTable.of(goal), self.directory)
+        board = Npuzzle.trusted(start.n, start.tiles.copy(), start.blank)
+        node = Node(start)
+        self.__add_to_path(node)
+
+        expanded = 0
+        while True:
+            if budget is not None:
+                limit = budget.check(expanded, 0)
+                if limit is not None:
+                    self.report.flush(expanded, len(self.path))
+                    self.report.out_of_budget(
+                        limit, best_h=oracle.distance(board.tiles)
+                    )
+                    return None
+            move = self.__look_up(oracle, board)
+            expanded += 1
+            if move is None:
+                self.report.flush(expanded, len(self.path))
+                return node if board == goal else None
+
+            board.make_move(move)
+            child = Node(board, node, move)
+            child.g = node.g + COST
+            self.__add_to_path(child)
+            node = child
+
+    @ReportManager.balance(1)
+    def __add_to_path(self, node: Node) -> None:
+        self.path.append(node)
+
+    @ReportManager.count
+    def __look_up(self, oracle: OracleFile, board: Npuzzle) -> Move | None:
+        return oracle.move(board.tiles)
 
 
 AVAILABLE_SOLVERS: list[Type[Solver]] = [
@@ -353,10 +1548,167 @@ AVAILABLE_SOLVERS: list[Type[Solver]] = [
     BFS,
     DFS,
     IDAStar,
+    BidirectionalSearch,
+    ARAStar,
+    SMAStar,
+    Oracle,
+    ParallelIDAStar,
+    HDAStar,
 ]
 
 DEFAULT_SOLVER: Type[Solver] = AStar
 
+# solvers whose solutions may be longer than the shortest one
+SUBOPTIMAL_SOLVERS: list[Type[Solver]] = [GreedySearch, DFS, ARAStar]
+
+
+def is_admissible(solver: Solver) -> bool:
+    return type(getattr(solver, "distance", None)) not in INADMISSIBLE_HEURISTICS
+
+
+def is_optimal(solver: Solver) -> bool:
+    # an anytime solver knows how far from the optimal its last solution is,
+    # as long as its heuristic doesn't overestimate
+    if not is_admissible(solver):
+        return False
+    if solver.report.stages:
+        return solver.report.stages[-1].suboptimality <= 1.0
+    return not isinstance(solver, tuple(SUBOPTIMAL_SOLVERS))
+
+
+class CachedSolver:
+    # answers from the cache when it knows the puzzle or a symmetric one,
+    # otherwise runs the solver and keeps its solution. The report is the one
+    # of the solver, nothing is expanded on a hit. Solvers of different
+    # scopes don't answer each other
+    def __init__(self, solver: Solver, cache: SolutionCache, scope: str = "") -> None:
+        self.solver = solver
+        self.cache = cache
+        self.scope = scope
+        # an anytime solver goes on until the optimal unless told otherwise
+        self.optimal = is_admissible(solver) and (
+            not isinstance(solver, tuple(SUBOPTIMAL_SOLVERS))
+            or getattr(solver, "anytime", False)
+        )
+        self.report: Report = solver.report
+
+    @ReportManager.as_result(Node.get_genealogy_size, if_failed=False)
+    @ReportManager.time
+    def run(
+        self, start: Npuzzle, goal: Npuzzle, budget: Budget | None = None
+    ) -> Node | None:
+        moves = self.cache.get(start, goal, self.optimal, self.scope)
+        if moves is not None:
+            self.report.cache_hits += 1
+            return Node.from_moves(start, list(Solution(start, moves)))
+
+        self.report.cache_misses += 1
+        res = self.solver.run(start, goal, budget)
+        if res is not None:
+            self.cache.put(
+                start,
+                goal,
+                str(Solution.from_node(res)),
+                is_optimal(self.solver),
+                self.scope,
+            )
+        return res
+
 
 def is_informed(solver: Type[Solver]) -> bool:
     return "distance" in inspect.signature(solver).parameters
+
+
+def has_open_list(solver: Type[Solver]) -> bool:
+    return "open_list" in inspect.signature(solver).parameters
+
+
+def has_jobs(solver: Type[Solver]) -> bool:
+    return "jobs" in inspect.signature(solver).parameters
+
+
+def has_weight(solver: Type[Solver]) -> bool:
+    return "weight" in inspect.signature(solver).parameters
+
+
+def has_max_nodes(solver: Type[Solver]) -> bool:
+    return "max_nodes" in inspect.signature(solver).parameters
+
+
+def is_compatible(
+    solver: Type[Solver], distance: Type[Distance] | None, n: int | None = None
+) -> bool:
+    # the oracle only knows the 3x3 puzzle, any size will do when n is None
+    if solver is BidirectionalSearch and distance in GOAL_TABLE_HEURISTICS:
+        return False
+    return (
+        n is None
+        or n == ORACLE_N
+        or (solver is not Oracle and distance is not ExactDistance)
+    )
+
+
+def missing_table(
+    solver: Type[Solver], distance: Type[Distance] | None, goal: Npuzzle
+) -> str | None:
+    # the table of the default directory a pair reads and that wasn't built,
+    # if any, as building one is a step of its own
+    table = GoalTable.of(goal)
+    if distance is PatternDatabase:
+        path = database_path(table, default_partition(table.n))
+    elif solver is Oracle or distance is ExactDistance:
+        path = oracle_path(table)
+    else:
+        return None
+    return None if os.path.exists(path) else path
+
+
+class SolverFactory:
+    # a new solver for each puzzle, as their lists belong to a single run,
+    # but the same heuristic, so that the tables it loaded are reused
+    def __init__(
+        self,
+        solver: Type[Solver],
+        distance: Distance | None = None,
+        open_list: Type[OpenList] = DEFAULT_OPEN_LIST,
+        tie_break: TieBreak = TieBreak.HIGH_G,
+        jobs: int | None = None,
+        weight: float | None = None,
+        anytime: bool = True,
+        max_nodes: int | None = None,
+        max_bytes: int | None = None,
+        cache: SolutionCache | None = None,
+        instrumentation: Instrumentation = DEFAULT_INSTRUMENTATION,
+    ) -> None:
+        self.solver = solver
+        self.distance = distance
+        self.open_list = open_list
+        self.tie_break = tie_break
+        self.jobs = jobs
+        self.weight = weight
+        self.anytime = anytime
+        self.max_nodes = max_nodes
+        self.max_bytes = max_bytes
+        self.cache = cache
+        self.instrumentation = instrumentation
+
+    def __call__(self) -> Solver:
+        options: dict[str, Any] = {"instrumentation": self.instrumentation}
+        if has_open_list(self.solver):
+            options["open_list"] = self.open_list(self.tie_break)
+        if has_jobs(self.solver):
+            options["jobs"] = self.jobs
+        if has_weight(self.solver):
+            options["anytime"] = self.anytime
+            if self.weight is not None:
+                options["weight"] = self.weight
+        if has_max_nodes(self.solver):
+            options["max_nodes"] = self.max_nodes
+            options["max_bytes"] = self.max_bytes
+        if is_informed(self.solver):
+            solver = self.solver(self.distance, **options)  # type: ignore
+        else:
+            solver = self.solver(**options)  # type: ignore
+        if self.cache is not None:
+            return CachedSolver(solver, self.cache)
+        return solver
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Any, Union
+
+NIBBLE_BITS = 4
+NIBBLE_MASK = (1 << NIBBLE_BITS) - 1
+MAX_NIBBLE_N = 4
+
+Key = Union[int, bytes]
+
+
+def pack(n: int, tiles: list[int]) -> Key:
+    if n <= MAX_NIBBLE_N:
+        key = 0
+        for tile in reversed(tiles):
+            key = (key << NIBBLE_BITS) | tile
+        return key
+    return bytes(tiles)
+
+
+def unpack(n: int, key: Key) -> list[int]:
+    if isinstance(key, int):
+        return [(key >> (NIBBLE_BITS * i)) & NIBBLE_MASK for i in range(n * n)]
+    return list(key)
+
+
+class PackedState:
+    """Immutable and hashable snapshot of a board.
+
+    Up to n=4 the tiles are packed in a single int (4 bits per tile), above
+    that in a bytes object (1 byte per tile). The hash is computed once.
+    """
+
+    __slots__ = ("n", "key", "_hash")
+
+    n: int
+    key: Key
+    _hash: int
+
+    def __init__(self, n: int, key: Key) -> None:
+        object.__setattr__(self, "n", n)
+        object.__setattr__(self, "key", key)
+        object.__setattr__(self, "_hash", hash(key))
+
+    @classmethod
+    def from_tiles(cls, n: int, tiles: list[int]) -> PackedState:
+        return cls(n, pack(n, tiles))
+
+    @property
+    def tiles(self) -> list[int]:
+        return unpack(self.n, self.key)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (type(self), (self.n, self.key))
+
+    def __repr__(self) -> str:
+        return f"PackedState({self.tiles}, n={self.n})"
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PackedState):
+            return NotImplemented
+        return self._hash == other._hash and self.key == other.key
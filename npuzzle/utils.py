@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import contextlib
+import os
+import tempfile
 from enum import Enum, auto
-from typing import Any
+from typing import IO, Any, Iterator
 
 
 class Direction(Enum):
@@ -75,3 +78,44 @@ def snail_array(n: int) -> list[int]:
             left_index += 1
             dir = Direction.RIGHT
     return result
+
+
+@contextlib.contextmanager
+def replacing(path: str) -> Iterator[IO[bytes]]:
+    # the file is written next to path, then renamed over it: a reader never
+    # sees half a file and processes writing the same path don't truncate
+    # one another's
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(
+        prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=directory or None
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporary)
+        raise
+
+
+def count_inversions(values: list[int]) -> int:
+    # fenwick tree over the values, which must be a permutation of range(len)
+    size = len(values)
+    tree = [0] * (size + 1)
+    inversions = 0
+    for seen, value in enumerate(values):
+        # number of values already seen that are <= value
+        i = value + 1
+        lower = 0
+        while i > 0:
+            lower += tree[i]
+            i -= i & -i
+        inversions += seen - lower
+        i = value + 1
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
+    return inversions
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
+
+from npuzzle.utils import replacing
+
+COUNT_BITS = 3
+MAX_WALKING_N = 5
+CHUNK_SIZE = 1 << 20
+# small tables are turned into a dict, which is faster to look up than numpy
+DICT_LIMIT = 1 << 20
+
+
+class BoardTooBigError(Exception):
+    """Exception raised when n is too big for the walking distance tables."""
+
+    def __init__(
+        self,
+        n: int,
+        message: str = f"Walking distance tables only exist up to n={MAX_WALKING_N}",
+    ) -> None:
+        self.n = n
+        self.message = f"{message}. ({self.n} here)"
+        super().__init__(self.message)
+
+
+# A configuration tells, for each line (row or column) of the board, how many
+# tiles of each goal line it holds, plus the line of the empty tile. The last
+# count of a line is implied by the others, so it is left out of the key.
+
+
+def _shift(n: int, line: int, goal_line: int) -> int:
+    return COUNT_BITS * ((n - 1 - line) * (n - 1) + (n - 2 - goal_line))
+
+
+def key_of(counts: list[int], blank: int, n: int) -> int:
+    key = blank
+    for line in range(n):
+        for goal_line in range(n - 1):
+            key = (key << COUNT_BITS) | counts[line * n + goal_line]
+    return key
+
+
+def move_key(key: int, n: int, goal_line: int, src_line: int, dst_line: int) -> int:
+    # a tile of goal_line went from src_line to dst_line, the empty tile the
+    # other way: at most two counts and the line of the empty tile change
+    if goal_line < n - 1:
+        key += (1 << _shift(n, dst_line, goal_line)) - (
+            1 << _shift(n, src_line, goal_line)
+        )
+    return key + ((src_line - dst_line) << (COUNT_BITS * n * (n - 1)))
+
+
+def encode(counts: np.ndarray, blank: np.ndarray) -> np.ndarray:
+    n = counts.shape[1]
+    keys = blank.astype(np.int64)
+    for line in range(n):
+        for goal_line in range(n - 1):
+            keys = (keys << COUNT_BITS) | counts[:, line, goal_line]
+    return keys
+
+
+def decode(keys: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    counts = np.zeros((len(keys), n, n), dtype=np.int64)
+    mask = (1 << COUNT_BITS) - 1
+    keys = keys.copy()
+    for line in range(n - 1, -1, -1):
+        for goal_line in range(n - 2, -1, -1):
+            counts[:, line, goal_line] = keys & mask
+            keys >>= COUNT_BITS
+    blank = keys
+    sizes = np.full((len(keys), n), n, dtype=np.int64)
+    sizes[np.arange(len(keys)), blank] -= 1
+    counts[:, :, n - 1] = sizes - counts[:, :, : n - 1].sum(axis=2)
+    return counts, blank
+
+
+def _neighbours(frontier: np.ndarray, n: int) -> np.ndarray:
+    # the empty tile swaps with a tile of any goal line from an adjacent line
+    counts, blank = decode(frontier, n)
+    result: list[np.ndarray] = []
+    for delta in (-1, 1):
+        target = blank + delta
+        for goal_line in range(n):
+            rows = np.nonzero((target >= 0) & (target < n))[0]
+            rows = rows[counts[rows, target[rows], goal_line] > 0]
+            moved = counts[rows]
+            moved[np.arange(len(rows)), target[rows], goal_line] -= 1
+            moved[np.arange(len(rows)), blank[rows], goal_line] += 1
+            result.append(encode(moved, target[rows]))
+    return np.unique(np.concatenate(result))
+
+
+def _contains(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    if len(sorted_keys) == 0:
+        return np.zeros(len(keys), dtype=bool)
+    index = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return sorted_keys[index] == keys
+
+
+def build(
+    n: int, blank_line: int, progress: Callable[[str], None] | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    if n > MAX_WALKING_N:
+        raise BoardTooBigError(n)
+
+    counts = np.zeros((1, n, n), dtype=np.int64)
+    for line in range(n):
+        counts[0, line, line] = n - (line == blank_line)
+    goal = encode(counts, np.array([blank_line]))
+
+    # moves are reversible: the neighbours of a layer are in the previous,
+    # the same or the next layer, so only two layers have to be remembered
+    layers = [goal]
+    previous = np.zeros(0, dtype=np.int64)
+    current = goal
+    while len(current):
+        found = [
+            _neighbours(current[i : i + CHUNK_SIZE], n)
+            for i in range(0, len(current), CHUNK_SIZE)
+        ]
+        following = np.unique(np.concatenate(found))
+        following = following[~_contains(current, following)]
+        following = following[~_contains(previous, following)]
+        if progress is not None:
+            seen = sum(len(layer) for layer in layers) + len(following)
+            progress(
+                f"walking distance {n}x{n}: depth {len(layers)}, {seen} configurations"
+            )
+        previous, current = current, following
+        if len(current):
+            layers.append(current)
+
+    keys = np.concatenate(layers)
+    distances = np.concatenate(
+        [
+            np.full(len(layer), depth, dtype=np.uint8)
+            for depth, layer in enumerate(layers)
+        ]
+    )
+    order = np.argsort(keys)
+    return keys[order], distances[order]
+
+
+class WalkingTable:
+    def __init__(self, keys: np.ndarray, distances: np.ndarray) -> None:
+        self.keys = keys
+        self.distances = distances
+        self.lookup: Callable[[int], int]
+        if len(keys) <= DICT_LIMIT:
+            self.lookup = dict(zip(keys.tolist(), distances.tolist())).__getitem__
+        else:
+            self.lookup = self.__search
+
+    def __search(self, key: int) -> int:
+        return int(self.distances[np.searchsorted(self.keys, key)])
+
+    def evaluate(self, counts: list[int], blank: int, n: int) -> int:
+        return self.lookup(key_of(counts, blank, n))
+
+
+def table_paths(directory: str, n: int, blank_line: int) -> tuple[str, str]:
+    name = os.path.join(directory, f"{n}x{n}_{blank_line}")
+    return f"{name}.wd-keys.npy", f"{name}.wd-distances.npy"
+
+
+@lru_cache(maxsize=None)
+def walking_table(
+    n: int, blank_line: int, directory: str | None = None
+) -> WalkingTable:
+    # tables only depend on n and on the goal line of the empty tile
+    if directory is None:
+        return WalkingTable(*build(n, blank_line))
+
+    keys_path, distances_path = table_paths(directory, n, blank_line)
+    if not os.path.exists(distances_path):
+        # the distances are written last, their file tells the table is whole
+        keys, distances = build(n, blank_line)
+        with replacing(keys_path) as f:
+            np.save(f, keys)
+        with replacing(distances_path) as f:
+            np.save(f, distances)
+    # memory-mapped, so that every process using the same file shares its pages
+    return WalkingTable(
+        np.load(keys_path, mmap_mode="r"), np.load(distances_path, mmap_mode="r")
+    )
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from npuzzle.goal import GoalTable, Layout
+from npuzzle.npuzzle import Npuzzle
+from npuzzle.oracle import OracleFile, build, load, oracle_path
+from npuzzle.pdb import build as build_pdb
+from npuzzle.pdb import database_path, default_partition
+
+# size and number of the boards of each test, the same ones on every run
+N = 3
+BOARDS = 12
+SEED = 42
+
+
+@pytest.fixture(scope="session")
+def tables(tmp_path_factory: pytest.TempPathFactory) -> str:
+    # the oracle and the pattern database of the goal, built once
+    directory = str(tmp_path_factory.mktemp("pdbs"))
+    table = GoalTable.from_layout(N, Layout.SNAIL)
+    build(table, oracle_path(table, directory))
+    partition = default_partition(N)
+    build_pdb(table, partition, database_path(table, partition, directory))
+    return directory
+
+
+@pytest.fixture(scope="session")
+def oracle(tables: str) -> OracleFile:
+    return load(GoalTable.from_layout(N, Layout.SNAIL), tables)
+
+
+@pytest.fixture
+def goal() -> Npuzzle:
+    return Npuzzle.goal_for(N, Layout.SNAIL)
+
+
+@pytest.fixture
+def boards(goal: Npuzzle) -> list[Npuzzle]:
+    random.seed(SEED)
+    return [Npuzzle.from_random(N, goal=goal) for _ in range(BOARDS)]
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from npuzzle.benchmark import Benchmark
+from npuzzle.distance import AVAILABLE_HEURISTICS
+from npuzzle.solver import AVAILABLE_SOLVERS
+
+CFGS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cfgs")
+
+
+def load_cfg(name: str) -> Benchmark:
+    with open(os.path.join(CFGS_DIRECTORY, name)) as f:
+        cfg = json.load(f)
+    return Benchmark(
+        [solver for solver in AVAILABLE_SOLVERS if solver.__name__ in cfg["solvers"]],
+        [
+            heuristic
+            for heuristic in AVAILABLE_HEURISTICS
+            if heuristic.__name__ in cfg["heuristics"]
+        ],
+    )
+
+
+@pytest.mark.parametrize("name", ["astar_all_h.json", "idastar_all_h.json"])
+def test_shipped_cfg_without_tables(
+    name: str,
+    tmp_path: str,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    # a fresh checkout has no pdbs/, the pairs reading a table are left out
+    monkeypatch.chdir(tmp_path)
+    paths = load_cfg(name).stream_statistics("run", iter=2, seed=0)
+    assert "Warning: no table in" in capsys.readouterr().out
+    assert paths and all(os.path.exists(path) for path in paths)
+    assert not any("PatternDatabase" in path for path in paths)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from npuzzle.budget import Budget, Limit, rss
+from npuzzle.distance import Manhattan
+from npuzzle.npuzzle import Npuzzle
+from npuzzle.solver import AStar, HDAStar, IDAStar, ParallelIDAStar
+
+
+def test_expanded(goal: Npuzzle, boards: list[Npuzzle]) -> None:
+    for solver in (AStar(Manhattan()), IDAStar(Manhattan())):
+        assert solver.run(boards[0], goal, Budget(expanded=1)) is None
+        assert solver.report.budget_hit == Limit.EXPANDED
+        # IDA* only knows its bound
+        report = solver.report
+        assert report.best_h is not None or report.bound is not None
+
+
+def test_time() -> None:
+    budget = Budget(seconds=0)
+    budget.start()
+    assert budget.exceeded() == Limit.TIME
+
+
+def test_memory_of_the_solve_only(goal: Npuzzle, boards: list[Npuzzle]) -> None:
+    # the process already takes more than the limit, the solves don't
+    budget = Budget(memory=rss() // 2)
+    for board in boards:
+        assert AStar(Manhattan()).run(board, goal, budget) is not None
+    budget.start()
+    assert budget.exceeded() is None
+    assert budget.exceeded(memory=2 * budget.memory) == Limit.MEMORY
+
+
+def test_reused(goal: Npuzzle, boards: list[Npuzzle]) -> None:
+    budget = Budget(seconds=60, expanded=100000)
+    for board in boards:
+        assert AStar(Manhattan()).run(board, goal, budget) is not None
+
+
+def test_parallel(goal: Npuzzle, boards: list[Npuzzle]) -> None:
+    # the counts of the workers are summed
+    for solver in (HDAStar(Manhattan(), jobs=2), ParallelIDAStar(Manhattan(), jobs=2)):
+        assert solver.run(boards[0], goal, Budget(expanded=1)) is None
+        assert solver.report.budget_hit == Limit.EXPANDED
+    solver = HDAStar(Manhattan(), jobs=2)
+    assert solver.run(boards[0], goal, Budget(frontier=1)) is None
+    assert solver.report.budget_hit == Limit.FRONTIER
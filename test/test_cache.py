@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from npuzzle.cache import SolutionCache, canonical, leads_to, symmetries
+from npuzzle.distance import Manhattan, TilesOutOfRowCol
+from npuzzle.npuzzle import EMPTY_TILE, Npuzzle
+from npuzzle.solution import Solution
+from npuzzle.solver import AStar, CachedSolver
+
+
+def image(board: Npuzzle, cells: tuple[int, ...], tiles: tuple[int, ...]) -> Npuzzle:
+    result = [EMPTY_TILE] * len(board.tiles)
+    for i, tile in enumerate(board.tiles):
+        result[cells[i]] = tiles[tile]
+    return Npuzzle(board.n, result)
+
+
+@pytest.mark.parametrize("n", [3, 4])
+def test_symmetries(n: int) -> None:
+    goal = Npuzzle.goal_for(n)
+    found = symmetries(n, tuple(goal.tiles))
+    assert found
+    random.seed(2)
+    board = Npuzzle.trusted(n, goal.tiles.copy(), goal.blank)
+    walk = []
+    for _ in range(40):
+        move, board = random.choice(board.expand())
+        walk.append(move)
+    inverse = "".join(move.inverse.letter for move in reversed(walk))
+    for symmetry in found:
+        assert image(goal, symmetry.cells, symmetry.tiles) == goal
+        twin = image(board, symmetry.cells, symmetry.tiles)
+        assert leads_to(twin, goal, inverse.translate(symmetry.forward))
+        assert canonical(twin, goal)[0] == canonical(board, goal)[0]
+
+
+def test_symmetric_hit(goal: Npuzzle, boards: list[Npuzzle]) -> None:
+    cache = SolutionCache(None)
+    board = boards[0]
+    res = AStar(Manhattan()).run(board, goal)
+    assert res is not None
+    cache.put(board, goal, str(Solution.from_node(res)), optimal=True)
+    for symmetry in symmetries(goal.n, tuple(goal.tiles)):
+        twin = image(board, symmetry.cells, symmetry.tiles)
+        moves = cache.get(twin, goal)
+        assert moves is not None and len(moves) == res.g
+        assert leads_to(twin, goal, moves)
+
+
+def test_scopes_and_optimality(goal: Npuzzle, boards: list[Npuzzle]) -> None:
+    cache = SolutionCache(None)
+    board = boards[0]
+    cache.put(board, goal, "", optimal=False, scope="GreedySearch")
+    assert cache.get(board, goal, optimal=False, scope="AStar") is None
+    assert cache.get(board, goal, optimal=True, scope="GreedySearch") is None
+
+    # an inadmissible heuristic doesn't make a solution optimal
+    solver = CachedSolver(AStar(TilesOutOfRowCol()), cache)
+    assert not solver.optimal
+    assert solver.run(board, goal) is not None
+    assert cache.get(board, goal, optimal=True) is None
+
+
+def test_persistent(tmp_path, goal: Npuzzle, boards: list[Npuzzle]) -> None:
+    path = str(tmp_path / "solutions.sqlite")
+    cache = SolutionCache(path)
+    for board in boards:
+        CachedSolver(AStar(Manhattan()), cache).run(board, goal)
+    cache.close()
+    cache = SolutionCache(path)
+    assert len(cache) == len(boards)
+    for board in boards:
+        solver = CachedSolver(AStar(Manhattan()), cache)
+        assert solver.run(board, goal) is not None
+        assert solver.report.cache_hits == 1
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from npuzzle.distance import (
+    AVAILABLE_HEURISTICS,
+    INADMISSIBLE_HEURISTICS,
+    Distance,
+    ExactDistance,
+    LinearConflict,
+    Manhattan,
+    PatternDatabase,
+    WalkingDistance,
+    is_incremental,
+    successor_distance,
+)
+from npuzzle.npuzzle import Npuzzle
+from npuzzle.oracle import OracleFile
+from npuzzle.solver import AStar
+
+# moves of the random walks along which update is checked
+WALK = 500
+
+HEURISTICS = {heuristic.__name__: heuristic for heuristic in AVAILABLE_HEURISTICS}
+ADMISSIBLE_HEURISTICS = [
+    name
+    for name, heuristic in HEURISTICS.items()
+    if heuristic not in INADMISSIBLE_HEURISTICS
+]
+# the heuristics reading tables read those of the session
+TABLE_HEURISTICS = [PatternDatabase, WalkingDistance, ExactDistance]
+
+
+def make(name: str, tables: str) -> Distance:
+    heuristic = HEURISTICS[name]
+    if heuristic in TABLE_HEURISTICS:
+        return heuristic(directory=tables)  # type: ignore
+    return heuristic()
+
+
+@pytest.mark.parametrize("name", HEURISTICS)
+def test_update_is_compute(
+    name: str, tables: str, goal: Npuzzle, boards: list[Npuzzle]
+) -> None:
+    distance = make(name, tables)
+    if not is_incremental(distance):
+        pytest.skip(f"{name} has no update")
+    random.seed(0)
+    board = boards[0]
+    h = distance.compute(board, goal)
+    for _ in range(WALK):
+        _, child = random.choice(board.expand())
+        h = successor_distance(distance, h, board, child, goal)
+        assert h == distance.compute(child, goal)
+        board = child
+
+
+@pytest.mark.parametrize("name", ADMISSIBLE_HEURISTICS)
+def test_admissible(
+    name: str,
+    tables: str,
+    oracle: OracleFile,
+    goal: Npuzzle,
+    boards: list[Npuzzle],
+) -> None:
+    distance = make(name, tables)
+    for board in boards:
+        shortest = oracle.distance(board.tiles)
+        assert distance.compute(board, goal) <= shortest
+        res = AStar(distance).run(board, goal)
+        assert res is not None and res.g == shortest
+
+
+def test_zero_at_goal(tables: str, goal: Npuzzle) -> None:
+    for name in HEURISTICS:
+        assert make(name, tables).compute(goal, goal) == 0
+
+
+def test_linear_conflict_bounds(goal: Npuzzle, boards: list[Npuzzle]) -> None:
+    # above Manhattan, but not above the length of an optimal solution
+    for board in boards:
+        h = LinearConflict().compute(board, goal)
+        assert Manhattan().compute(board, goal) <= h
+        res = AStar(Manhattan()).run(board, goal)
+        assert res is not None and h <= res.g
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from npuzzle.node import Node
+from npuzzle.npuzzle import Npuzzle
+from npuzzle.openlist import AVAILABLE_OPEN_LISTS, HeapOpenList, OpenList, TieBreak
+
+# nodes pushed in each test
+NODES = 300
+
+
+def random_nodes(goal: Npuzzle) -> dict[Node, int]:
+    random.seed(1)
+    nodes = {}
+    for _ in range(NODES):
+        node = Node(Npuzzle.from_random(goal.n, goal=goal))
+        node.g = random.randrange(20)
+        nodes[node] = node.g + random.randrange(20)
+    return nodes
+
+
+def drain(open_list: OpenList, nodes: dict[Node, int]) -> list[tuple[int, int]]:
+    popped = []
+    while open_list:
+        node = open_list.pop()
+        popped.append((nodes[node], node.g))
+    return popped
+
+
+@pytest.mark.parametrize("open_list", AVAILABLE_OPEN_LISTS)
+@pytest.mark.parametrize("tie_break", list(TieBreak))
+def test_pop_order(open_list: type, tie_break: TieBreak, goal: Npuzzle) -> None:
+    nodes = random_nodes(goal)
+    tested = open_list(tie_break)
+    reference = HeapOpenList(tie_break)
+    for node, priority in nodes.items():
+        tested.push(node, priority)
+        reference.push(node, priority)
+    assert len(tested) == len(reference)
+    popped = drain(tested, nodes)
+    assert popped == sorted(popped, key=lambda entry: entry[0])
+    assert popped == drain(reference, nodes)
+    if tie_break == TieBreak.HIGH_G:
+        assert popped == sorted(popped, key=lambda entry: (entry[0], -entry[1]))
+    elif tie_break == TieBreak.LOW_G:
+        assert popped == sorted(popped)
+
+
+@pytest.mark.parametrize("open_list", AVAILABLE_OPEN_LISTS)
+def test_push_replaces(open_list: type, goal: Npuzzle) -> None:
+    tested = open_list()
+    first = Node(goal)
+    first.g = 10
+    second = Node(goal)
+    second.g = 5
+    other = Node(Npuzzle.from_random(goal.n, goal=goal))
+    tested.push(first, 15)
+    tested.push(other, 12)
+    tested.push(second, 8)
+    assert len(tested) == 2
+    assert first in tested and tested.get(first) is second
+    assert tested.pop() is second
+    assert tested.pop() is other
+    assert not tested
+
+
+@pytest.mark.parametrize("open_list", AVAILABLE_OPEN_LISTS)
+def test_empty(open_list: type, goal: Npuzzle) -> None:
+    tested = open_list()
+    with pytest.raises(IndexError):
+        tested.top()
+    node = Node(goal)
+    tested.push(node, 3)
+    tested.push(node, 2)
+    assert tested.top() == 2
+    tested.pop()
+    with pytest.raises(IndexError):
+        tested.top()
+    with pytest.raises(IndexError):
+        tested.pop()
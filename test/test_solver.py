@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Callable
+
+import pytest
+
+from npuzzle.distance import Manhattan
+from npuzzle.npuzzle import Npuzzle
+from npuzzle.oracle import OracleFile
+from npuzzle.solution import Solution
+from npuzzle.solver import (
+    ARAStar,
+    AStar,
+    BidirectionalSearch,
+    IDAStar,
+    Oracle,
+    SMAStar,
+    Solver,
+)
+
+OPTIMAL_SOLVERS: dict[str, Callable[[str], Solver]] = {
+    "AStar": lambda tables: AStar(Manhattan()),
+    "IDAStar": lambda tables: IDAStar(Manhattan()),
+    "SMAStar": lambda tables: SMAStar(Manhattan(), max_nodes=500),
+    "ARAStar": lambda tables: ARAStar(Manhattan()),
+    "BidirectionalSearch": lambda tables: BidirectionalSearch(Manhattan()),
+    "Oracle": lambda tables: Oracle(tables),
+}
+
+
+def leads_to_goal(start: Npuzzle, goal: Npuzzle, moves: str) -> bool:
+    board = Npuzzle.trusted(start.n, start.tiles.copy(), start.blank)
+    for move in Solution(start, moves):
+        assert board.make_move(move)
+    return board == goal
+
+
+@pytest.mark.parametrize("name", OPTIMAL_SOLVERS)
+def test_optimal_solution(
+    name: str,
+    tables: str,
+    oracle: OracleFile,
+    goal: Npuzzle,
+    boards: list[Npuzzle],
+) -> None:
+    for board in boards:
+        solver = OPTIMAL_SOLVERS[name](tables)
+        res = solver.run(board, goal)
+        assert res is not None
+        moves = str(Solution.from_node(res))
+        assert leads_to_goal(board, goal, moves)
+        assert len(moves) == oracle.distance(board.tiles)
+
+
+def test_already_solved(goal: Npuzzle) -> None:
+    res = AStar(Manhattan()).run(goal, goal)
+    assert res is not None and res.g == 0